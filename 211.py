@@ -33,19 +33,27 @@ class UsersInput:
 
 
 class DataSet:
-    def __init__(self, compiled_file):
-        self.reader = []
-        for row in csv.reader(open(compiled_file, encoding='utf_8_sig')):
-            self.reader += [row]
-        if len(self.reader) == 0:
+    def __init__(self, compiled_file, stream=False):
+        self.file_name = compiled_file
+        with open(compiled_file, encoding='utf_8_sig') as file:
+            self.columns_names = next(csv.reader(file), None)
+        if self.columns_names is None:
             print('Пустой файл')
             exit()
-        self.columns_names = self.reader[0]
-        self.vacancies_data = []
-        for row in self.reader[1:]:
-            if len(row) == len(self.columns_names) and row.count('') == 0:
-                self.vacancies_data += [row]
-        if len(self.vacancies_data) == 0:
+        self.vacancies_data = self.read_vacancies_data()
+        if not stream:
+            self.vacancies_data = list(self.vacancies_data)
+
+    def read_vacancies_data(self):
+        is_empty = True
+        with open(self.file_name, encoding='utf_8_sig') as file:
+            rows = csv.reader(file)
+            next(rows, None)
+            for row in rows:
+                if len(row) == len(self.columns_names) and row.count('') == 0:
+                    is_empty = False
+                    yield row
+        if is_empty:
             print('Нет данных')
             exit()
 
@@ -154,14 +162,15 @@ class Constractor:
                self.town_salary, self.town_job_rate
 
     def set_position_key_to_zero(self):
-        for key in list(self.year_vacancy_amount.amount_dict.keys()):
-            if key not in list(self.year_position_vacancy_amount.amount_dict.keys()):
+        for key in self.year_vacancy_amount.amount_dict:
+            if key not in self.year_position_vacancy_amount.amount_dict:
                 self.year_position_vacancy_amount.amount_dict[key] = 0
 
     def set_key_to_zero(self):
-        for key in list(self.year_salary.calculate_average_salary().keys()):
-            if key not in list(self.year_vacancy_salary.calculate_average_salary().keys()):
-                self.year_vacancy_salary.calculate_average_salary()[key] = 0
+        year_vacancy_salary = self.year_vacancy_salary.calculate_average_salary()
+        for key in self.year_salary.calculate_average_salary():
+            if key not in year_vacancy_salary:
+                year_vacancy_salary[key] = 0
 
     def calculate_stat_values(self, place, vacancies):
         for position in vacancies:
@@ -177,32 +186,17 @@ class Constractor:
     @staticmethod
     def calculate_highest_average_salary(list_all_salary):
         average_salary_values = []
-        town_tracker = {}
-        for i in range(len(list_all_salary.salary_dict)):
-            town = list(list_all_salary.salary_dict)[i]
-            town_tracker[town] = len(list(list_all_salary.salary_dict.values())[i])
-            aver = int(sum(list(list_all_salary.salary_dict.values())[i]) /
-                       len(list(list_all_salary.salary_dict.values())[i]))
-            average_salary_values.append((town, aver))
-
         del_for_towns = []
-        del_town_index = []
-        for i in range(len(town_tracker.items())):
-            town = list(town_tracker)[i]
-            percentage = round(100 * int(list(town_tracker.values())[i]) / sum(town_tracker.values()), 1)
+        total = sum(len(salaries) for salaries in list_all_salary.salary_dict.values())
+        for town, salaries in list_all_salary.salary_dict.items():
+            percentage = round(100 * len(salaries) / total, 1)
             if percentage < 1 or town == 'Россия':
-                del_for_towns.append((town, list(town_tracker.values())[i]))
-                del_town_index.append(i)
-
-        for i in reversed(range(len(del_for_towns))):
-            del town_tracker[del_for_towns[i][0]]
-            del average_salary_values[del_town_index[i]]
+                del_for_towns.append((town, len(salaries)))
+            else:
+                average_salary_values.append((town, int(sum(salaries) / len(salaries))))
 
-        highest_average_salary = dict(sorted(average_salary_values, key=lambda row: row[1], reverse=True))
-        significant_salaries = {}
-        for key, value in highest_average_salary.items():
-            significant_salaries[key] = value
-        return {x: significant_salaries[x] for x in list(significant_salaries)[:10]}, del_for_towns
+        highest_average_salary = sorted(average_salary_values, key=lambda row: row[1], reverse=True)
+        return dict(highest_average_salary[:10]), del_for_towns
 
     @staticmethod
     def find_highest_town_rating(town_job_rate):
@@ -248,10 +242,9 @@ class CreateReport:
 
         for i, name in enumerate(titles_2):
             self.sheet2.cell(row=1, column=(i + 1), value=name).font = Font(bold=True)
-        for i in range(len(list(town_salary.keys()))):
-            self.sheet2.append(
-                [list(town_salary.keys())[i], list(town_salary.values())[i], list(town_job_rate.keys())[i],
-                 list(town_job_rate.values())[i]])
+        town_job_rate_items = iter(town_job_rate.items())
+        for town, salary in town_salary.items():
+            self.sheet2.append([town, salary, *next(town_job_rate_items, (None, None))])
 
         cell_border = Side(border_style='thin', color='000000')
         self.place_border(self.sheet1, cell_border)
@@ -285,12 +278,9 @@ class CreateReport:
 
 
 def generate_output(data_vacancies, position_title):
-    compiled_vacancies_arr = []
-    for compilation in data_vacancies:
-        compilation = Vacancy(dict(zip(column_headers, compilation)))
-        compiled_vacancies_arr.append(compilation)
+    compiled_vacancies = (Vacancy(dict(zip(column_headers, compilation))) for compilation in data_vacancies)
     data = Constractor()
-    data = data.compile_data(compiled_vacancies_arr, position_title)
+    data = data.compile_data(compiled_vacancies, position_title)
 
     print(f'Динамика уровня зарплат по годам: {data[0]}')
     print(f'Динамика количества вакансий по годам: {data[1]}')
@@ -303,7 +293,7 @@ def generate_output(data_vacancies, position_title):
 
 
 users_input = UsersInput()
-requested_data = DataSet(users_input.compiled_file)
+requested_data = DataSet(users_input.compiled_file, stream=True)
 column_headers, vacancies_data = requested_data.columns_names, requested_data.vacancies_data
 output_data = generate_output(vacancies_data, users_input.position_title)
 generated_report = CreateReport()
@@ -1,16 +1,20 @@
 import csv
-from datetime import datetime
+import glob
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ElementTree
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from itertools import repeat
+from operator import itemgetter
 from statistics import mean
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
 import numpy as np
-import matplotlib.pyplot as plt
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
-import cProfile
-import dateparser
-import datetime as dt
 import csv_file_separator as csv_files_generator
 
 
@@ -18,6 +22,17 @@ currency_to_rub = {'AZN': 35.68, 'BYR': 23.91, 'EUR': 59.90, 'GEL': 21.74, 'KGS'
                    'UAH': 1.64, 'USD': 60.66, 'UZS': 0.0055
                    }
 
+csv_columns = ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')
+VacancyRecord = namedtuple('VacancyRecord', csv_columns + ('published_month',))
+
+
+class ReportError(Exception):
+    """Ошибка входных данных отчёта: некорректное название файла или профессии, пустой файл, нет данных"""
+
+
+class MultilineRowError(ReportError):
+    """В диапазоне байтов файла есть вакансия, значение которой в кавычках переносится на следующую строку"""
+
 
 class UsersInput:
     """Класс для пользовательского ввода по шаблону"""
@@ -25,7 +40,7 @@ class UsersInput:
         """Инициализация объекта UsersInput"""
         self.compiled_file = input('Введите название файла: ')
         self.position_title = input('Введите название профессии: ')
-        self.compiled_file = self.check_file_name(self.compiled_file)
+        self.compiled_file = self.validate_file_name(self.compiled_file)
         self.position_title = self.validate_position_name(self.position_title)
 
     @staticmethod
@@ -34,10 +49,12 @@ class UsersInput:
         Валидация названия файла
         Args:
             compiled_file (str): Выбранный файл
+
+        Raises:
+            ReportError: название файла пустое или без расширения
         """
         if compiled_file == '' or '.' not in compiled_file:
-            print('Некорректное название файла')
-            exit()
+            raise ReportError('Некорректное название файла')
         return compiled_file
 
     @staticmethod
@@ -49,20 +66,23 @@ class UsersInput:
 
         Returns:
             str: корректное название профессии
+
+        Raises:
+            ReportError: название профессии пустое
         """
         if position_title == '':
-            print('Некорректное название профессии')
-            exit()
+            raise ReportError('Некорректное название профессии')
         return position_title
 
 
 class DataSet:
     """Класс, представляющий сбор данных"""
-    def __init__(self, compiled_file):
+    def __init__(self, compiled_file, stream=False):
         """Инициализация объекта DataSet
 
         Args:
             compiled_file (str): Выбранный файл
+            stream (bool): отдавать строки лениво, по мере чтения файла
 
         >>> type(DataSet("vacancies_by_year.csv", "Аналитик")).__name__
         'DataSet'
@@ -71,27 +91,47 @@ class DataSet:
         >>> DataSet("vacancies_by_year.csv", "Аналитик").file_name
         'vacancies.csv'
         """
-        self.reader = []
-        for row in csv.reader(open(compiled_file, encoding='utf_8_sig')):
-            self.reader += [row]
-        if len(self.reader) == 0:
-            print('Пустой файл')
-            exit()
-        self.columns_names = self.reader[0]
-        self.vacancies_data = []
-        for row in self.reader[1:]:
-            if len(row) == len(self.columns_names) and row.count('') == 0:
-                self.vacancies_data += [row]
-        if len(self.vacancies_data) == 0:
-            print('Нет данных')
-            exit()
-
-    def parse_csv(self):
-        """Считывает данные из csv-файла и форматирует их"""
-
-        csv_strings, titles = reader.csv_reader(self.file_name)
-        csv_files_generator.parse_by_years(csv_strings, titles)
-        self.vacancies_objects = reader.csv_filer(csv_strings, titles, self.create_vacancy)
+        self.file_name = compiled_file
+        with open(compiled_file, encoding='utf_8_sig') as file:
+            self.columns_names = next(csv.reader(file), None)
+        if self.columns_names is None:
+            raise ReportError('Пустой файл')
+        self.vacancies_data = self.read_vacancies_data()
+        if not stream:
+            self.vacancies_data = list(self.vacancies_data)
+
+    def read_vacancies_data(self):
+        """Построчно считывает файл и отдаёт только корректные строки, не храня их в памяти
+
+            Yields:
+                list: строка вакансии, в которой заполнены все колонки
+        """
+        is_empty = True
+        with open(self.file_name, encoding='utf_8_sig') as file:
+            rows = csv.reader(file)
+            next(rows, None)
+            for row in rows:
+                if len(row) == len(self.columns_names) and row.count('') == 0:
+                    is_empty = False
+                    yield row
+        if is_empty:
+            raise ReportError('Нет данных')
+
+    def to_columns(self):
+        """Собрать корректные строки файла в колоночное хранилище
+
+            Returns:
+                VacancyColumns: вакансии в виде типизированных массивов
+        """
+        return VacancyColumns.from_rows(self.vacancies_data, self.columns_names)
+
+    def parse_csv(self, directory='years_data'):
+        """Потоково разложить файл по csv-файлам годов для обработки compile_years_parallel
+
+            Args:
+                directory (str): папка для файлов по годам
+        """
+        csv_files_generator.separate_years_file(self.file_name, directory)
 
 class Vacancy:
     """Класс, представляющий вакансии"""
@@ -122,7 +162,10 @@ class Vacancy:
         'Vacancy'
         """
         for key, value in vacancy.items():
-            self.__setattr__(key, self.formatter(key, value))
+            if key == 'published_at':
+                self.published_at, self.published_month = csv_files_generator.parse_date(value)[:2]
+            else:
+                self.__setattr__(key, self.formatter(key, value))
 
     @staticmethod
     def formatter(key, value):
@@ -139,10 +182,373 @@ class Vacancy:
         if key in ['salary_from', 'salary_to']:
             return float(value)
         if key == 'published_at':
-            return int(datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').strftime('%Y'))
+            return csv_files_generator.parse_date(value)[0]
         return value
 
 
+class VacancyColumns:
+    """Колоночное представление вакансий: типизированные массивы вместо объектов Vacancy
+
+    Зарплаты хранятся в float64, год публикации в int16, месяц публикации в int8, а название, валюта и город -
+    кодами int32 в справочниках уникальных значений. На одну вакансию приходится около 30 байт.
+    """
+    chunk_size = 65536
+    cache_version = 3
+    array_fields = ('salary_from', 'salary_to', 'published_at', 'published_month', 'name_codes', 'currency_codes',
+                    'area_codes')
+    category_fields = ('names', 'currencies', 'area_names')
+
+    def __init__(self, salary_from, salary_to, published_at, published_month, name_codes, names, currency_codes,
+                 currencies, area_codes, area_names):
+        """Инициализация объекта VacancyColumns
+
+            Args:
+                salary_from (np.ndarray): нижние границы оклада
+                salary_to (np.ndarray): верхние границы оклада
+                published_at (np.ndarray): годы публикации
+                published_month (np.ndarray): месяцы публикации
+                name_codes (np.ndarray): коды названий вакансий
+                names (list): названия вакансий по кодам
+                currency_codes (np.ndarray): коды валют
+                currencies (list): валюты по кодам
+                area_codes (np.ndarray): коды городов
+                area_names (list): города по кодам
+        """
+        self.salary_from = salary_from
+        self.salary_to = salary_to
+        self.published_at = published_at
+        self.published_month = published_month
+        self.name_codes = name_codes
+        self.names = names
+        self.currency_codes = currency_codes
+        self.currencies = currencies
+        self.area_codes = area_codes
+        self.area_names = area_names
+        self.name_index = None
+        self.is_name_searched = False
+
+    @classmethod
+    def from_rows(cls, rows, column_headers):
+        """Заполнить колонки из строк csv-файла за один проход
+
+            Args:
+                rows: корректные строки вакансий
+                column_headers (list): заголовки колонок
+
+            Returns:
+                VacancyColumns: вакансии в виде типизированных массивов
+        """
+        salary_from, salary_to, published_at, published_month = array('d'), array('d'), array('h'), array('b')
+        name_codes, currency_codes, area_codes = array('i'), array('i'), array('i')
+        names, currencies, area_names = {}, {}, {}
+        published_values = []
+        indexes = [column_headers.index(title) for title in csv_columns]
+        for row in rows:
+            name, s_from, s_to, currency, area, published = [row[i] for i in indexes]
+            salary_from.append(Vacancy.formatter('salary_from', s_from))
+            salary_to.append(Vacancy.formatter('salary_to', s_to))
+            published_values.append(published)
+            if len(published_values) == cls.chunk_size:
+                cls.extend_dates(published_at, published_month, published_values)
+                published_values = []
+            name_codes.append(cls.intern(names, name))
+            currency_codes.append(cls.intern(currencies, currency))
+            area_codes.append(cls.intern(area_names, area))
+        if published_values:
+            cls.extend_dates(published_at, published_month, published_values)
+        return cls(np.frombuffer(salary_from, dtype=np.float64), np.frombuffer(salary_to, dtype=np.float64),
+                   np.frombuffer(published_at, dtype=np.int16), np.frombuffer(published_month, dtype=np.int8),
+                   np.frombuffer(name_codes, dtype=np.int32), list(names),
+                   np.frombuffer(currency_codes, dtype=np.int32), list(currencies),
+                   np.frombuffer(area_codes, dtype=np.int32), list(area_names))
+
+    @staticmethod
+    def extend_dates(published_at, published_month, published_values):
+        """Разобрать порцию дат публикации и дописать годы и месяцы в колонки
+
+            Args:
+                published_at (array): колонка годов
+                published_month (array): колонка месяцев
+                published_values (list): даты публикации
+        """
+        years, months, days = csv_files_generator.parse_dates(published_values)
+        published_at.extend(years.tolist())
+        published_month.extend(months.tolist())
+
+    @staticmethod
+    def intern(categories, value):
+        """Получить код значения в справочнике, добавив его при первой встрече
+
+            Args:
+                categories (dict): справочник значение -> код
+                value (str): значение колонки
+
+            Returns:
+                int: код значения
+        """
+        code = categories.get(value)
+        if code is None:
+            code = categories[value] = len(categories)
+        return code
+
+    @classmethod
+    def from_column_files(cls, directory='years_data', years=None, predicate=None):
+        """Собрать колонки из колоночных файлов годов, созданных csv_file_separator.create_column_files
+
+        Лишние колонки не читаются, а файлы неподходящих годов отбрасываются по статистике, не открываясь.
+
+            Args:
+                directory (str): папка с колоночными файлами
+                years: нужные годы; None - все годы
+                predicate: функция отбора файла по словарю min/max его колонок
+
+            Returns:
+                VacancyColumns: вакансии выбранных годов
+        """
+        fields = {field: [] for field in cls.array_fields}
+        names, currencies, area_names = {}, {}, {}
+        for column_file in csv_files_generator.find_column_files(directory, years, predicate):
+            data = csv_files_generator.read_column_file(column_file, VacancyRecord._fields)
+            fields['salary_from'].append(data['salary_from'])
+            fields['salary_to'].append(data['salary_to'])
+            fields['published_at'].append(data['published_at'])
+            fields['published_month'].append(data['published_month'])
+            fields['name_codes'].append(cls.recode(names, *data['name']))
+            fields['currency_codes'].append(cls.recode(currencies, *data['salary_currency']))
+            fields['area_codes'].append(cls.recode(area_names, *data['area_name']))
+        dtypes = {'salary_from': np.float64, 'salary_to': np.float64, 'published_at': np.int16,
+                  'published_month': np.int8}
+        fields = {field: np.concatenate(parts) if parts else np.zeros(0, dtype=dtypes.get(field, np.int32))
+                  for field, parts in fields.items()}
+        return cls(names=list(names), currencies=list(currencies), area_names=list(area_names), **fields)
+
+    @classmethod
+    def recode(cls, categories, codes, values):
+        """Перевести коды колонки из справочника файла в общий справочник
+
+            Args:
+                categories (dict): общий справочник значение -> код
+                codes (np.ndarray): коды в справочнике файла
+                values (list): справочник файла
+
+            Returns:
+                np.ndarray: коды в общем справочнике
+        """
+        mapping = np.array([cls.intern(categories, value) for value in values], dtype=np.int32)
+        return mapping[codes] if len(mapping) else codes.astype(np.int32)
+
+    def find_prof_rows(self, prof):
+        """Найти номера строк вакансий, в названии которых есть prof
+
+        Колонки из кэша load_vacancy_columns открываются вместе с сохранённым NameIndex. Для остальных колонок
+        построение индекса дороже одного просмотра уникальных названий, поэтому первый запрос проверяет
+        названия напрямую, а индекс строится только при повторном запросе к тем же колонкам.
+
+            Args:
+                prof (str): название профессии
+
+            Returns:
+                np.ndarray: номера строк по возрастанию
+        """
+        if self.name_index is None and not self.is_name_searched:
+            self.is_name_searched = True
+            return np.flatnonzero(np.array([prof in name for name in self.names], dtype=bool)[self.name_codes])
+        return self.get_name_index().find_rows(prof)
+
+    def get_name_index(self):
+        """Получить индекс по названиям вакансий, построив его при первом обращении
+
+            Returns:
+                NameIndex: индекс названий этих колонок
+        """
+        if self.name_index is None:
+            self.name_index = NameIndex.from_names(self.names, self.name_codes)
+        return self.name_index
+
+    def save(self, file_name):
+        """Сохранить колонки и индекс названий в несжатый npz-файл; файл подменяется целиком, только когда
+        запись завершена
+
+            Args:
+                file_name (str): путь к npz-файлу
+        """
+        fields = {field: getattr(self, field) for field in self.array_fields}
+        fields.update({field: np.array(getattr(self, field), dtype=str) for field in self.category_fields})
+        name_index = self.get_name_index()
+        fields.update({f'name_index.{field}': getattr(name_index, field) for field in NameIndex.array_fields})
+        temp_file = f'{file_name}.tmp{os.getpid()}'
+        with open(temp_file, 'wb') as file:
+            np.savez(file, **fields)
+        os.replace(temp_file, file_name)
+
+    @classmethod
+    def load(cls, file_name):
+        """Загрузить колонки из npz-файла, сохранённого методом save
+
+            Args:
+                file_name (str): путь к npz-файлу
+
+            Returns:
+                VacancyColumns: вакансии в виде типизированных массивов
+        """
+        with np.load(file_name) as data:
+            fields = {field: data[field] for field in cls.array_fields}
+            fields.update({field: data[field].tolist() for field in cls.category_fields})
+            index_fields = {field: data[f'name_index.{field}'] for field in NameIndex.array_fields}
+        columns = cls(**fields)
+        columns.name_index = NameIndex(columns.names, **index_fields)
+        return columns
+
+    def save_memmap(self, directory):
+        """Сохранить каждую колонку и каждый массив индекса названий в отдельный npy-файл, который потом
+        можно отобразить в память
+
+        Папка заполняется под временным именем и переименовывается, только когда запись завершена.
+
+            Args:
+                directory (str): папка колонок
+        """
+        temp_directory = f'{directory}.tmp{os.getpid()}'
+        os.makedirs(temp_directory, exist_ok=True)
+        for field in self.array_fields:
+            np.save(os.path.join(temp_directory, f'{field}.npy'), getattr(self, field))
+        name_index = self.get_name_index()
+        for field in NameIndex.array_fields:
+            np.save(os.path.join(temp_directory, f'name_index.{field}.npy'), getattr(name_index, field))
+        with open(os.path.join(temp_directory, 'categories.json'), 'w', encoding='utf-8') as file:
+            json.dump({field: getattr(self, field) for field in self.category_fields}, file, ensure_ascii=False)
+        try:
+            os.replace(temp_directory, directory)
+        except OSError:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+    @classmethod
+    def open_memmap(cls, directory):
+        """Открыть колонки, сохранённые save_memmap, как np.memmap только для чтения
+
+        Данные не читаются при открытии: страницы подгружаются по мере обращения к ним и делятся
+        через страничный кэш между всеми процессами, открывшими ту же папку.
+
+            Args:
+                directory (str): папка колонок
+
+            Returns:
+                VacancyColumns: вакансии в виде отображённых в память массивов
+        """
+        fields = {field: np.load(os.path.join(directory, f'{field}.npy'), mmap_mode='r') for field in cls.array_fields}
+        with open(os.path.join(directory, 'categories.json'), encoding='utf-8') as file:
+            fields.update(json.load(file))
+        columns = cls(**fields)
+        columns.name_index = NameIndex(columns.names, **{
+            field: np.load(os.path.join(directory, f'name_index.{field}.npy'), mmap_mode='r')
+            for field in NameIndex.array_fields})
+        return columns
+
+    def __len__(self):
+        return len(self.published_at)
+
+    def __iter__(self):
+        """Перебрать вакансии в виде VacancyRecord, разворачивая колонки порциями по chunk_size строк"""
+        for start in range(0, len(self), self.chunk_size):
+            end = start + self.chunk_size
+            for name, s_from, s_to, currency, area, published, month in zip(
+                    self.name_codes[start:end].tolist(), self.salary_from[start:end].tolist(),
+                    self.salary_to[start:end].tolist(), self.currency_codes[start:end].tolist(),
+                    self.area_codes[start:end].tolist(), self.published_at[start:end].tolist(),
+                    self.published_month[start:end].tolist()):
+                yield VacancyRecord(self.names[name], s_from, s_to, self.currencies[currency],
+                                    self.area_names[area], published, month)
+
+
+class NameIndex:
+    """Индекс для поиска вакансий по подстроке названия
+
+    Уникальные названия раскладываются по триграммам, а номера строк группируются по коду названия,
+    поэтому запрос проверяет только названия-кандидаты и сразу получает их строки, не просматривая все вакансии.
+    Списки названий триграмм и строк названий хранятся сжатыми строками (CSR) в массивах numpy, поэтому
+    индекс сохраняется в кэш вместе с колонками и открывается оттуда без перестроения.
+    """
+    gram_size = 3
+    array_fields = ('grams', 'gram_offsets', 'gram_codes', 'row_ids', 'offsets')
+
+    def __init__(self, names, grams, gram_offsets, gram_codes, row_ids, offsets):
+        """Инициализация объекта NameIndex
+
+            Args:
+                names (list): уникальные названия вакансий по кодам
+                grams (np.ndarray): триграммы названий
+                gram_offsets (np.ndarray): границы списка кодов названий каждой триграммы в gram_codes
+                gram_codes (np.ndarray): коды названий, содержащих триграммы, подряд по триграммам
+                row_ids (np.ndarray): номера строк, устойчиво отсортированные по коду названия
+                offsets (np.ndarray): границы строк каждого кода названия в row_ids
+        """
+        self.names = names
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_codes = gram_codes
+        self.row_ids = row_ids
+        self.offsets = offsets
+        self.gram_ids = {gram: i for i, gram in enumerate(grams.tolist())}
+
+    @classmethod
+    def from_names(cls, names, name_codes):
+        """Построить индекс по названиям вакансий
+
+            Args:
+                names (list): уникальные названия вакансий по кодам
+                name_codes (np.ndarray): код названия каждой вакансии
+
+            Returns:
+                NameIndex: индекс названий
+        """
+        postings = {}
+        for code, name in enumerate(names):
+            for gram in {name[i:i + cls.gram_size] for i in range(len(name) - cls.gram_size + 1)}:
+                postings.setdefault(gram, []).append(code)
+        gram_offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(codes) for codes in postings.values()], out=gram_offsets[1:])
+        gram_codes = np.fromiter((code for codes in postings.values() for code in codes), dtype=np.int32,
+                                 count=int(gram_offsets[-1]))
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(name_codes, minlength=len(names)), out=offsets[1:])
+        return cls(names, np.array(list(postings), dtype=f'U{cls.gram_size}'), gram_offsets, gram_codes,
+                   np.argsort(name_codes, kind='stable'), offsets)
+
+    def find_names(self, prof):
+        """Найти коды названий, содержащих prof, с той же семантикой, что и prof in name
+
+            Args:
+                prof (str): название профессии
+
+            Returns:
+                list: коды подходящих названий по возрастанию
+        """
+        if len(prof) < self.gram_size:
+            candidates = range(len(self.names))
+        else:
+            gram_ids = [self.gram_ids.get(prof[i:i + self.gram_size]) for i in range(len(prof) - self.gram_size + 1)]
+            if None in gram_ids:
+                return []
+            postings = sorted((self.gram_codes[self.gram_offsets[i]:self.gram_offsets[i + 1]].tolist()
+                               for i in gram_ids), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        return sorted(code for code in candidates if prof in self.names[code])
+
+    def find_rows(self, prof):
+        """Найти номера строк вакансий, в названии которых есть prof
+
+            Args:
+                prof (str): название профессии
+
+            Returns:
+                np.ndarray: номера строк по возрастанию
+        """
+        parts = [self.row_ids[self.offsets[code]:self.offsets[code + 1]] for code in self.find_names(prof)]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+
 class Salary:
     """Класс представления зарплаты"""
     def __init__(self, salary_from, salary_to, salary_currency):
@@ -158,10 +564,120 @@ class Salary:
         self.salary_currency = salary_currency
 
 
+class SalaryAccumulator:
+    """Накопитель статистики зарплат по одному ключу, занимающий O(1) памяти
+
+    Сумма хранится точно: числителем при знаменателе-степени двойки, поэтому среднее совпадает
+    со statistics.mean по тем же зарплатам. Рядом копится обычная последовательная сумма float, по которой
+    средние по городам считаются так же, как int(sum(список) / len(список)) в построчном подсчёте.
+    """
+    __slots__ = ('count', 'numerator', 'denominator', 'squares_sum', 'minimum', 'maximum', 'float_sum')
+
+    def __init__(self):
+        """Инициализация объекта SalaryAccumulator"""
+        self.count = 0
+        self.numerator = 0
+        self.denominator = 1
+        self.squares_sum = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.float_sum = 0.0
+
+    def append(self, salary):
+        """Учесть зарплату
+
+            Args:
+                salary (int or float): зарплата
+        """
+        numerator, denominator = salary.as_integer_ratio()
+        if denominator > self.denominator:
+            self.numerator *= denominator // self.denominator
+            self.denominator = denominator
+        self.numerator += numerator * (self.denominator // denominator)
+        self.count += 1
+        self.float_sum += salary
+        self.squares_sum += salary * salary
+        if self.minimum is None or salary < self.minimum:
+            self.minimum = salary
+        if self.maximum is None or salary > self.maximum:
+            self.maximum = salary
+
+    def merge(self, other):
+        """Добавить к накопителю статистику другого накопителя
+
+        Последовательные суммы float складываются, поэтому после объединения частей среднее по ним может
+        отличаться от подсчёта одним проходом, только если оно отстоит от целого числа меньше чем
+        на погрешность округления.
+
+            Args:
+                other (SalaryAccumulator): накопитель по тому же ключу
+
+            Returns:
+                SalaryAccumulator: этот же накопитель
+        """
+        if other.denominator > self.denominator:
+            self.numerator *= other.denominator // self.denominator
+            self.denominator = other.denominator
+        self.numerator += other.numerator * (self.denominator // other.denominator)
+        self.count += other.count
+        self.float_sum += other.float_sum
+        self.squares_sum += other.squares_sum
+        if other.minimum is not None and (self.minimum is None or other.minimum < self.minimum):
+            self.minimum = other.minimum
+        if other.maximum is not None and (self.maximum is None or other.maximum > self.maximum):
+            self.maximum = other.maximum
+        return self
+
+    def __add__(self, other):
+        return deepcopy(self).merge(other)
+
+    def to_state(self):
+        """Состояние накопителя в виде списка, пригодного для json
+
+            Returns:
+                list: [количество, числитель, знаменатель, сумма квадратов, минимум, максимум, сумма float]
+        """
+        return [self.count, self.numerator, self.denominator, self.squares_sum, self.minimum, self.maximum,
+                self.float_sum]
+
+    @classmethod
+    def from_state(cls, state):
+        """Восстановить накопитель из состояния, полученного to_state
+
+            Args:
+                state (list): состояние накопителя
+
+            Returns:
+                SalaryAccumulator: восстановленный накопитель
+        """
+        accumulator = cls()
+        accumulator.count, accumulator.numerator, accumulator.denominator, accumulator.squares_sum, \
+            accumulator.minimum, accumulator.maximum, accumulator.float_sum = state
+        return accumulator
+
+    @property
+    def total(self):
+        """float: сумма зарплат, округлённая до ближайшего float"""
+        return self.numerator / self.denominator
+
+    def mean(self):
+        """Среднее значение зарплаты
+
+            Returns:
+                float: среднее, округлённое так же, как statistics.mean
+        """
+        return self.numerator / (self.denominator * self.count)
+
+
 class SalaryDict:
     """Класс формирования словаря для подсчёта статистики зарплат"""
-    def __init__(self):
-        """Инициализация объекта SalaryDict"""
+    def __init__(self, accumulate=False):
+        """Инициализация объекта SalaryDict
+
+            Args:
+                accumulate (bool): хранить по ключу SalaryAccumulator вместо списка всех зарплат
+        """
+        self.accumulate = accumulate
         self.salary_dict = {}
         self.__average_salary_dict = {}
 
@@ -177,15 +693,79 @@ class SalaryDict:
         """
 
         if self.salary_dict.get(key) is None:
-            self.salary_dict[key] = []
+            self.salary_dict[key] = SalaryAccumulator() if self.accumulate else []
         return self.salary_dict[key].append(salary)
 
     def calculate_average_salary(self):
         """Подсчёт средней цифры заработной платы"""
         for key, value in self.salary_dict.items():
-            self.__average_salary_dict[key] = int(mean(value))
+            self.__average_salary_dict[key] = int(value.mean()) if self.accumulate else int(mean(value))
         return self.__average_salary_dict
 
+    def merge(self, other):
+        """Добавить к словарю зарплаты другого словаря; новые ключи встают в конец
+
+            Args:
+                other (SalaryDict): словарь зарплат; списки можно добавить к накопителям, но не наоборот
+
+            Returns:
+                SalaryDict: этот же словарь
+        """
+        if other.accumulate and not self.accumulate:
+            raise ValueError('Накопленные суммы нельзя добавить к спискам зарплат')
+        for key, value in other.salary_dict.items():
+            if self.salary_dict.get(key) is None:
+                self.salary_dict[key] = SalaryAccumulator() if self.accumulate else []
+            if other.accumulate:
+                self.salary_dict[key].merge(value)
+            elif self.accumulate:
+                for salary in value:
+                    self.salary_dict[key].append(salary)
+            else:
+                self.salary_dict[key].extend(value)
+        return self
+
+    def __add__(self, other):
+        return deepcopy(self).merge(other)
+
+    def to_state(self):
+        """Состояние словаря в виде, пригодном для json; порядок и типы ключей сохраняются
+
+            Returns:
+                dict: режим словаря и пары (ключ, зарплаты)
+        """
+        return {'accumulate': self.accumulate,
+                'salary_dict': [[key, value.to_state() if self.accumulate else list(value)]
+                                for key, value in self.salary_dict.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        """Восстановить словарь из состояния, полученного to_state
+
+            Args:
+                state (dict): состояние словаря
+
+            Returns:
+                SalaryDict: восстановленный словарь
+        """
+        salary_dict = cls(state['accumulate'])
+        for key, value in state['salary_dict']:
+            salary_dict.salary_dict[key] = SalaryAccumulator.from_state(value) if salary_dict.accumulate \
+                else list(value)
+        return salary_dict
+
+    def get_salary_stats(self):
+        """Перебрать количество и последовательную сумму float зарплат по каждому ключу
+
+            Yields:
+                tuple: (ключ, количество зарплат, сумма зарплат)
+        """
+        for key, value in self.salary_dict.items():
+            if self.accumulate:
+                yield key, value.count, value.float_sum
+            else:
+                yield key, len(value), sum(value)
+
 
 class CountDict:
     """Класс статистики"""
@@ -204,6 +784,46 @@ class CountDict:
         self.length += 1
         return
 
+    def merge(self, other):
+        """Добавить к счётчикам значения другого CountDict; новые ключи встают в конец
+
+            Args:
+                other (CountDict): другой счётчик
+
+            Returns:
+                CountDict: этот же счётчик
+        """
+        for key, value in other.amount_dict.items():
+            self.amount_dict[key] = self.amount_dict.get(key, 0) + value
+        self.length += other.length
+        return self
+
+    def __add__(self, other):
+        return deepcopy(self).merge(other)
+
+    def to_state(self):
+        """Состояние счётчика в виде, пригодном для json; порядок и типы ключей сохраняются
+
+            Returns:
+                dict: общее количество и пары (ключ, количество)
+        """
+        return {'length': self.length, 'amount_dict': [[key, value] for key, value in self.amount_dict.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        """Восстановить счётчик из состояния, полученного to_state
+
+            Args:
+                state (dict): состояние счётчика
+
+            Returns:
+                CountDict: восстановленный счётчик
+        """
+        count_dict = cls()
+        count_dict.length = state['length']
+        count_dict.amount_dict = {key: value for key, value in state['amount_dict']}
+        return count_dict
+
     def calculate_proportion(self):
         """Посчитать пропорцию"""
         proportion_dict = {}
@@ -217,68 +837,397 @@ class CountDict:
         return
 
 
+class TownRanking:
+    """Отбор первых k городов по зарплате или доле вакансий за один проход по статистике городов"""
+    def __init__(self, top_k=10, threshold=0.01, excluded_town='Россия'):
+        """Инициализация объекта TownRanking
+
+            Args:
+                top_k (int): сколько городов попадает в рейтинг; None - все города
+                threshold (float): минимальная доля вакансий города
+                excluded_town (str): область, которая не считается городом
+        """
+        self.top_k = top_k
+        self.threshold = threshold
+        self.excluded_town = excluded_town
+
+    def select(self, town_values):
+        """Выбрать k пар с наибольшими значениями за O(n log k)
+
+        heapq.nlargest равен sorted(..., reverse=True)[:k], поэтому города с одинаковым значением
+        остаются в порядке их появления.
+
+            Args:
+                town_values: пары (город, значение)
+
+            Returns:
+                list: пары (город, значение) по убыванию значения
+        """
+        if self.top_k is None:
+            return sorted(town_values, key=itemgetter(1), reverse=True)
+        return heapq.nlargest(self.top_k, town_values, key=itemgetter(1))
+
+    def rank_salaries(self, town_stats, total):
+        """Рейтинг городов по средней зарплате среди городов с долей вакансий не меньше порога
+
+            Args:
+                town_stats: тройки (город, количество вакансий, средняя зарплата)
+                total (int): количество всех вакансий
+
+            Returns:
+                tuple: (словарь город -> средняя зарплата, отброшенные пары (город, количество вакансий))
+        """
+        del_for_towns = []
+        town_salaries = []
+        for town, amount, average in town_stats:
+            if round(100 * amount / total, 1) < 100 * self.threshold or town == self.excluded_town:
+                del_for_towns.append((town, amount))
+            else:
+                town_salaries.append((town, average))
+        return dict(self.select(town_salaries)), del_for_towns
+
+    def rank_proportions(self, town_counts, total):
+        """Рейтинг городов по доле вакансий
+
+            Args:
+                town_counts: пары (город, количество вакансий)
+                total (int): количество всех вакансий
+
+            Returns:
+                list: пары (город, доля вакансий) по убыванию доли
+        """
+        return self.select((town, round(amount / total, 4)) for town, amount in town_counts
+                           if amount / total >= self.threshold and town != self.excluded_town)
+
+
+class ProfessionMatcher:
+    """Автомат Ахо-Корасик: находит все профессии, входящие в название вакансии, за один проход по нему"""
+    def __init__(self, profs):
+        """Инициализация объекта ProfessionMatcher
+
+            Args:
+                profs (list): названия профессий
+        """
+        self.profs = list(dict.fromkeys(profs))
+        self.transitions = [{}]
+        self.fails = [0]
+        self.outputs = [set()]
+        for i, prof in enumerate(self.profs):
+            node = 0
+            for char in prof:
+                if char not in self.transitions[node]:
+                    self.transitions[node][char] = len(self.transitions)
+                    self.transitions.append({})
+                    self.fails.append(0)
+                    self.outputs.append(set())
+                node = self.transitions[node][char]
+            self.outputs[node].add(i)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.transitions[node].items():
+                queue.append(child)
+                fail = self.fails[node]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fails[fail]
+                self.fails[child] = self.transitions[fail].get(char, 0)
+                self.outputs[child] |= self.outputs[self.fails[child]]
+
+    def find(self, name):
+        """Найти профессии, которые входят в название вакансии так же, как при проверке prof in name
+
+            Args:
+                name (str): название вакансии
+
+            Returns:
+                list: найденные профессии в порядке их перечисления
+        """
+        node = 0
+        found = set(self.outputs[0])
+        for char in name:
+            while node and char not in self.transitions[node]:
+                node = self.fails[node]
+            node = self.transitions[node].get(char, 0)
+            found |= self.outputs[node]
+        return [self.profs[i] for i in sorted(found)]
+
+
+class CurrencyRates:
+    """Курсы валют к рублю по месяцам с заменой на постоянные курсы currency_to_rub, если истории нет
+
+    Курсы загружаются из выгрузки ЦБ (XML_daily, один или несколько элементов ValCurs) или из csv-файла
+    с колонками date, currency, rate и необязательной nominal. Курсы одного месяца усредняются.
+    Для каждой валюты строится плотный массив курсов по месяцам от первого до последнего известного:
+    пропущенные месяцы берут предыдущий курс, месяцы раньше или позже истории - крайний курс.
+    Поэтому курс по (валюта, месяц) находится за O(1), а для целой колонки - одной выборкой numpy.
+    """
+    loaded = OrderedDict()
+    loaded_limit = 8
+
+    def __init__(self, month_rates=None, default_rates=None):
+        """Инициализация объекта CurrencyRates
+
+            Args:
+                month_rates (dict): валюта -> {номер месяца (год * 12 + месяц - 1): курс}
+                default_rates (dict): постоянные курсы валют без истории; по умолчанию - currency_to_rub
+        """
+        self.default_rates = currency_to_rub if default_rates is None else default_rates
+        self.tables = {}
+        for currency, rates in (month_rates or {}).items():
+            if currency == 'RUR' or not rates:
+                continue
+            first_month, last_month = min(rates), max(rates)
+            table = np.full(last_month - first_month + 1, np.nan)
+            for month, rate in rates.items():
+                table[month - first_month] = rate
+            filled = np.maximum.accumulate(np.where(np.isnan(table), 0, np.arange(len(table))))
+            self.tables[currency] = (first_month, table[filled])
+
+    @classmethod
+    def from_file(cls, file_name, default_rates=None):
+        """Загрузить курсы из xml-выгрузки ЦБ или csv-файла; загруженный файл кэшируется по отпечатку
+
+        В кэше хранятся loaded_limit последних загрузок; ключ включает и сами постоянные курсы.
+
+            Args:
+                file_name (str): путь к файлу курсов
+                default_rates (dict): постоянные курсы валют без истории
+
+            Returns:
+                CurrencyRates: курсы валют
+        """
+        key = (os.path.abspath(file_name), get_file_fingerprint(file_name),
+               None if default_rates is None else tuple(sorted(default_rates.items())))
+        if key in cls.loaded:
+            cls.loaded.move_to_end(key)
+        else:
+            if file_name.lower().endswith('.xml'):
+                records = cls.read_cbr_xml(file_name)
+            else:
+                records = cls.read_csv(file_name)
+            sums = {}
+            for currency, month, rate in records:
+                total = sums.setdefault(currency, {}).setdefault(month, [0.0, 0])
+                total[0] += rate
+                total[1] += 1
+            month_rates = {currency: {month: total / amount for month, (total, amount) in rates.items()}
+                           for currency, rates in sums.items()}
+            cls.loaded[key] = cls(month_rates, None if default_rates is None else dict(default_rates))
+            if len(cls.loaded) > cls.loaded_limit:
+                cls.loaded.popitem(last=False)
+        return cls.loaded[key]
+
+    @classmethod
+    def read_cbr_xml(cls, file_name):
+        """Прочитать курсы из выгрузки ЦБ формата XML_daily
+
+            Args:
+                file_name (str): путь к xml-файлу
+
+            Yields:
+                tuple: (валюта, номер месяца, курс за единицу валюты)
+        """
+        root = ElementTree.parse(file_name).getroot()
+        for val_curs in root.iter('ValCurs'):
+            month = cls.parse_month(val_curs.get('Date', ''))
+            for valute in val_curs.iter('Valute'):
+                nominal = float(valute.findtext('Nominal', '1').replace(',', '.'))
+                rate = float(valute.findtext('Value').replace(',', '.'))
+                yield valute.findtext('CharCode'), month, rate / nominal
+
+    @classmethod
+    def read_csv(cls, file_name):
+        """Прочитать курсы из csv-файла с колонками date, currency, rate и необязательной nominal
+
+            Args:
+                file_name (str): путь к csv-файлу
+
+            Yields:
+                tuple: (валюта, номер месяца, курс за единицу валюты)
+        """
+        with open(file_name, encoding='utf-8-sig') as file:
+            for row in csv.DictReader(file):
+                nominal = float((row.get('nominal') or '1').replace(',', '.'))
+                yield row['currency'], cls.parse_month(row['date']), float(row['rate'].replace(',', '.')) / nominal
+
+    @staticmethod
+    def parse_month(value):
+        """Получить номер месяца (год * 12 + месяц - 1) из даты вида 2022-07-05, 2022-07 или 05.07.2022
+
+            Args:
+                value (str): дата
+
+            Returns:
+                int: номер месяца
+        """
+        value = value.strip()
+        if len(value) >= 10 and value[2] in './' and value[5] in './':
+            year, month = int(value[6:10]), int(value[3:5])
+        else:
+            year, month = int(value[0:4]), int(value[5:7])
+        if not 1 <= month <= 12:
+            raise ValueError(f'Некорректная дата курса: {value}')
+        return year * 12 + month - 1
+
+    def get_rate(self, currency, year, month):
+        """Курс валюты к рублю в месяце публикации
+
+            Args:
+                currency (str): валюта
+                year (int): год
+                month (int): месяц
+
+            Returns:
+                float: курс
+        """
+        table = self.tables.get(currency)
+        if table is None:
+            return self.default_rates[currency]
+        first_month, rates = table
+        return float(rates[min(max(year * 12 + month - 1 - first_month, 0), len(rates) - 1)])
+
+    def get_column_rates(self, currencies, currency_codes, years, months):
+        """Курсы для целой колонки вакансий одной выборкой из таблицы (валюта, месяц)
+
+            Args:
+                currencies (list): валюты по кодам
+                currency_codes (np.ndarray): коды валют вакансий
+                years (np.ndarray): годы публикации
+                months (np.ndarray): месяцы публикации
+
+            Returns:
+                np.ndarray: курс для каждой вакансии
+        """
+        tables = [self.tables.get(currency) for currency in currencies]
+        known = [table for table in tables if table is not None]
+        if not known:
+            return np.array([self.default_rates[currency] for currency in currencies], dtype=np.float64)[currency_codes]
+        first_month = min(table[0] for table in known)
+        last_month = max(table[0] + len(table[1]) - 1 for table in known)
+        all_months = np.arange(first_month, last_month + 1)
+        rate_table = np.empty((len(currencies), len(all_months)), dtype=np.float64)
+        for code, (currency, table) in enumerate(zip(currencies, tables)):
+            if table is None:
+                rate_table[code] = self.default_rates[currency]
+            else:
+                rate_table[code] = table[1][np.clip(all_months - table[0], 0, len(table[1]) - 1)]
+        month_numbers = years.astype(np.int64) * 12 + months.astype(np.int64) - 1
+        return rate_table[currency_codes, np.clip(month_numbers - first_month, 0, len(all_months) - 1)]
+
+
 class Constractor:
     """Собрать полученные статистические данные в одну структуру"""
-    def __init__(self):
-        """Инициализация объекта Constractor"""
-        self.year_salary = SalaryDict()
+    state_fields = ('year_salary', 'year_vacancy_amount', 'year_vacancy_salary', 'year_position_vacancy_amount',
+                    'town_salary', 'town_job_rating')
+
+    def __init__(self, accumulate=False, top_k=10, threshold=0.01, rates=None, details=None):
+        """Инициализация объекта Constractor
+
+            Args:
+                accumulate (bool): копить по ключам только счётчики и суммы зарплат, а не списки
+                top_k (int): сколько городов попадает в рейтинги городов; None - все города
+                threshold (float): минимальная доля вакансий города для рейтингов
+                rates (CurrencyRates): курсы валют по месяцам; None - постоянные курсы currency_to_rub
+                details (VacancyDetails): куда построчно выгружать вакансии профессии; None - не выгружать
+        """
+        self.town_ranking = TownRanking(top_k, threshold)
+        self.rates = rates
+        self.details = details
+        self.year_salary = SalaryDict(accumulate)
         self.year_vacancy_amount = CountDict()
-        self.year_vacancy_salary = SalaryDict()
+        self.year_vacancy_salary = SalaryDict(accumulate)
         self.year_position_vacancy_amount = CountDict()
-        self.town_salary = SalaryDict()
+        self.town_salary = SalaryDict(accumulate)
         self.town_job_rating = CountDict()
 
     def compile_data(self, vacancies, prof):
         """Получить и объединить данные статистики из словаря
 
             Args:
-                vacancies: вакансия
+                vacancies: вакансии - объекты Vacancy или VacancyColumns
                 prof (str): название профессии
 
             Returns: tuple: (средняя зарплата, годовое количество мест, средняя зарплата по вакансии, количество
             вакансий по годам, зарплата по городам, городской рейтинг профессий)
         """
+        if isinstance(vacancies, VacancyColumns):
+            return self.compile_columns(vacancies, prof)
         self.calculate_stat_values(prof, vacancies)
-        if self.year_vacancy_salary.salary_dict == {}:
-            self.year_vacancy_salary.salary_dict = {x: [0] for x in self.year_salary.salary_dict.keys()}
-        elif self.year_vacancy_salary.salary_dict != {} and len(
-                list(self.year_salary.calculate_average_salary().keys())) != len(
-            list(self.year_vacancy_salary.calculate_average_salary().keys())):
-            for key in list(self.year_salary.calculate_average_salary().keys()):
-                self.set_key_to_zero(key)
-        if self.year_position_vacancy_amount.amount_dict == {}:
-            self.year_position_vacancy_amount.amount_dict = {x: 0 for x in self.year_vacancy_amount.amount_dict.keys()}
-        elif self.year_position_vacancy_amount.amount_dict != {} and len(
-                list(self.year_vacancy_amount.amount_dict.keys())) != len(
-            list(self.year_position_vacancy_amount.amount_dict.keys())):
-            for key in list(self.year_vacancy_amount.amount_dict.keys()):
-                self.set_position_vacancy_amount_to_zero(key)
-        self.town_salary, del_for_towns = self.calculate_highest_average_salary(self.town_salary)
-        self.town_job_rating.calculate_proportion()
-        self.town_job_rating = self.find_highest_town_rating(self.town_job_rating)
-        self.town_job_rating = dict((x, y) for x, y in self.town_job_rating)
-        return self.year_salary.calculate_average_salary(), self.year_vacancy_amount.amount_dict, \
-               self.year_vacancy_salary.calculate_average_salary(), self.year_position_vacancy_amount.amount_dict, \
-               self.town_salary, self.town_job_rating
+        return self.assemble_data()
+
+    def assemble_data(self):
+        """Собрать итоговые данные статистики из накопленных значений, не изменяя их
 
-    def set_position_vacancy_amount_to_zero(self, key):
-        """Вспомогательная функция для приведения значения количества профессий к нулю по ключу
+            Returns: tuple: (средняя зарплата, годовое количество мест, средняя зарплата по вакансии, количество
+            вакансий по годам, зарплата по городам, городской рейтинг профессий)
+        """
+        year_salary = dict(self.year_salary.calculate_average_salary())
+        year_vacancy_salary = dict(self.year_vacancy_salary.calculate_average_salary())
+        for key in year_salary:
+            year_vacancy_salary.setdefault(key, 0)
+        year_position_vacancy_amount = dict(self.year_position_vacancy_amount.amount_dict)
+        for key in self.year_vacancy_amount.amount_dict:
+            year_position_vacancy_amount.setdefault(key, 0)
+        town_salary, del_for_towns = self.calculate_highest_average_salary(self.town_salary)
+        town_job_rating = dict(self.find_highest_town_rating(self.town_job_rating))
+        return year_salary, dict(self.year_vacancy_amount.amount_dict), year_vacancy_salary, \
+            year_position_vacancy_amount, town_salary, town_job_rating
+
+    def merge(self, other):
+        """Добавить к накопленной статистике статистику другого объекта Constractor
 
             Args:
-                key: ключ
+                other (Constractor): статистика по другой части вакансий
 
+            Returns:
+                Constractor: этот же объект с объединённой статистикой
+        """
+        self.year_salary.merge(other.year_salary)
+        self.year_vacancy_amount.merge(other.year_vacancy_amount)
+        self.year_vacancy_salary.merge(other.year_vacancy_salary)
+        self.year_position_vacancy_amount.merge(other.year_position_vacancy_amount)
+        self.town_salary.merge(other.town_salary)
+        self.town_job_rating.merge(other.town_job_rating)
+        return self
+
+    def __add__(self, other):
+        return deepcopy(self).merge(other)
+
+    def __deepcopy__(self, memo):
+        """Скопировать накопленную статистику
+
+        Курсы валют и выгрузка вакансий с открытым временным файлом не копируются, а остаются общими
+        с исходным объектом.
+        """
+        result = self.__class__.__new__(self.__class__)
+        memo[id(self)] = result
+        for name, value in self.__dict__.items():
+            setattr(result, name, value if name in ('rates', 'details') else deepcopy(value, memo))
+        return result
+
+    def to_state(self):
+        """Накопленная статистика в виде, пригодном для json
+
+            Returns:
+                dict: состояния всех словарей статистики
         """
-        if key not in list(self.year_position_vacancy_amount.amount_dict.keys()):
-            self.year_position_vacancy_amount.amount_dict[key] = 0
+        return {name: getattr(self, name).to_state() for name in self.state_fields}
 
-    def set_key_to_zero(self, key):
-        """Вспомогательная функция для приведения значения количества профессий к нулю по ключу
+    @classmethod
+    def from_state(cls, state):
+        """Восстановить статистику из состояния, полученного to_state
 
             Args:
-                key: ключ
+                state (dict): состояние статистики
+
+            Returns:
+                Constractor: восстановленная статистика
         """
-        if key not in list(self.year_vacancy_salary.calculate_average_salary().keys()):
-            self.year_vacancy_salary.calculate_average_salary()[key] = 0
+        constractor = cls()
+        for name in cls.state_fields:
+            field_class = SalaryDict if name in ('year_salary', 'year_vacancy_salary', 'town_salary') else CountDict
+            setattr(constractor, name, field_class.from_state(state[name]))
+        return constractor
 
     def calculate_stat_values(self, prof, vacancies):
         """Обновить полученные значения пунктов
@@ -288,7 +1237,7 @@ class Constractor:
                 vacancies: вакансии
         """
         for vacancy in vacancies:
-            vacancy_salary = (vacancy.salary_from + vacancy.salary_to) / 2 * currency_to_rub[vacancy.salary_currency]
+            vacancy_salary = self.get_vacancy_salary(vacancy)
             self.year_salary.append_salary(vacancy.published_at, vacancy_salary)
             self.year_vacancy_amount.update_amount(vacancy.published_at)
             self.town_salary.append_salary(vacancy.area_name, vacancy_salary)
@@ -296,9 +1245,169 @@ class Constractor:
             if prof in vacancy.name:
                 self.year_vacancy_salary.append_salary(vacancy.published_at, vacancy_salary)
                 self.year_position_vacancy_amount.update_amount(vacancy.published_at)
+                if self.details is not None:
+                    self.details.append(vacancy.name, vacancy.area_name, vacancy.published_at, vacancy_salary)
+
+    def get_vacancy_salary(self, vacancy):
+        """Средняя зарплата вакансии в рублях
+
+            Args:
+                vacancy (Vacancy): вакансия
+
+            Returns:
+                float: зарплата в рублях
+        """
+        if self.rates is None:
+            rate = currency_to_rub[vacancy.salary_currency]
+        else:
+            rate = self.rates.get_rate(vacancy.salary_currency, vacancy.published_at, vacancy.published_month)
+        return (vacancy.salary_from + vacancy.salary_to) / 2 * rate
+
+    def compile_batch(self, vacancies, profs):
+        """Получить данные статистики сразу для нескольких профессий за один проход по вакансиям
+
+            Args:
+                vacancies: вакансии - объекты Vacancy или VacancyColumns
+                profs (list): названия профессий
+
+            Returns:
+                dict: профессия -> tuple того же вида, что возвращает compile_data
+        """
+        if isinstance(vacancies, VacancyColumns):
+            return {prof: self.compile_columns(vacancies, prof) for prof in dict.fromkeys(profs)}
+        matcher = ProfessionMatcher(profs)
+        prof_stats = {prof: Constractor(self.year_salary.accumulate, self.town_ranking.top_k,
+                                        self.town_ranking.threshold, self.rates) for prof in matcher.profs}
+        found_profs = {}
+        for vacancy in vacancies:
+            vacancy_salary = self.get_vacancy_salary(vacancy)
+            self.year_salary.append_salary(vacancy.published_at, vacancy_salary)
+            self.year_vacancy_amount.update_amount(vacancy.published_at)
+            self.town_salary.append_salary(vacancy.area_name, vacancy_salary)
+            self.town_job_rating.update_amount(vacancy.area_name)
+            if vacancy.name not in found_profs:
+                found_profs[vacancy.name] = matcher.find(vacancy.name)
+            for prof in found_profs[vacancy.name]:
+                prof_stats[prof].year_vacancy_salary.append_salary(vacancy.published_at, vacancy_salary)
+                prof_stats[prof].year_position_vacancy_amount.update_amount(vacancy.published_at)
+        result = {}
+        for prof, stats in prof_stats.items():
+            stats.year_salary, stats.year_vacancy_amount = self.year_salary, self.year_vacancy_amount
+            stats.town_salary, stats.town_job_rating = self.town_salary, self.town_job_rating
+            result[prof] = stats.assemble_data()
+        return result
+
+    def compile_columns(self, columns, prof):
+        """Получить те же данные статистики, что и compile_data, группировками numpy по колонкам
+
+            Args:
+                columns (VacancyColumns): вакансии в виде типизированных массивов
+                prof (str): название профессии
+
+            Returns: tuple: (средняя зарплата, годовое количество мест, средняя зарплата по вакансии, количество
+            вакансий по годам, зарплата по городам, городской рейтинг профессий)
+        """
+        if self.rates is None:
+            rates = np.array([currency_to_rub[currency] for currency in columns.currencies],
+                             dtype=np.float64)[columns.currency_codes]
+        else:
+            rates = self.rates.get_column_rates(columns.currencies, columns.currency_codes, columns.published_at,
+                                                columns.published_month)
+        salaries = (columns.salary_from + columns.salary_to) / 2 * rates
+        prof_rows = columns.find_prof_rows(prof)
+        if self.details is not None:
+            for start in range(0, len(prof_rows), columns.chunk_size):
+                rows = prof_rows[start:start + columns.chunk_size]
+                self.details.extend(zip([columns.names[code] for code in columns.name_codes[rows].tolist()],
+                                        [columns.area_names[code] for code in columns.area_codes[rows].tolist()],
+                                        columns.published_at[rows].tolist(), salaries[rows].tolist()))
+
+        years, year_counts, year_sums = self.group_salaries(columns.published_at, salaries)
+        year_salary = self.calculate_group_averages(years, year_counts, year_sums, columns.published_at, salaries,
+                                                    lambda values: int(mean(values)))
+        year_vacancy_amount = dict(zip(years.tolist(), year_counts.tolist()))
+
+        prof_years, prof_counts, prof_sums = self.group_salaries(columns.published_at[prof_rows], salaries[prof_rows])
+        year_vacancy_salary = self.calculate_group_averages(prof_years, prof_counts, prof_sums,
+                                                            columns.published_at[prof_rows], salaries[prof_rows],
+                                                            lambda values: int(mean(values)))
+        year_position_vacancy_amount = dict(zip(prof_years.tolist(), prof_counts.tolist()))
+        for year in year_salary:
+            year_vacancy_salary.setdefault(year, 0)
+            year_position_vacancy_amount.setdefault(year, 0)
+
+        towns, town_counts, town_sums = self.group_salaries(columns.area_codes, salaries)
+        town_averages = self.calculate_group_averages(towns, town_counts, town_sums, columns.area_codes, salaries,
+                                                      lambda values: int(sum(values) / len(values)))
+        town_counts = town_counts.tolist()
+        total = len(columns)
+        town_names = [columns.area_names[town] for town in towns.tolist()]
+        town_salary, del_for_towns = self.town_ranking.rank_salaries(
+            zip(town_names, town_counts, town_averages.values()), total)
+        town_job_rating = dict(self.town_ranking.rank_proportions(zip(town_names, town_counts), total))
+        return year_salary, year_vacancy_amount, year_vacancy_salary, year_position_vacancy_amount, town_salary, \
+            town_job_rating
 
     @staticmethod
-    def calculate_highest_average_salary(list_all_salary):
+    def group_salaries(keys, salaries):
+        """Сгруппировать зарплаты по целочисленному ключу через np.bincount
+
+            Args:
+                keys (np.ndarray): ключи группировки (год или код города)
+                salaries (np.ndarray): зарплаты в рублях
+
+            Returns:
+                tuple: (ключи в порядке первой встречи, количество вакансий, сумма зарплат)
+        """
+        if len(keys) == 0:
+            return keys, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        offset = int(keys.min())
+        bins = keys.astype(np.int64) - offset
+        size = int(bins.max()) + 1
+        counts = np.bincount(bins, minlength=size)
+        sums = np.bincount(bins, weights=salaries, minlength=size)
+        first_seen = np.full(size, len(bins), dtype=np.int64)
+        np.minimum.at(first_seen, bins, np.arange(len(bins)))
+        present = np.flatnonzero(counts)
+        present = present[np.argsort(first_seen[present], kind='stable')]
+        return present + offset, counts[present], sums[present]
+
+    @staticmethod
+    def calculate_group_averages(keys, counts, sums, key_column, salaries, average):
+        """Посчитать целые средние зарплаты по группам так же, как их считает построчный подсчёт
+
+        Сумма из np.bincount может отличаться от точной в последних разрядах. Если среднее оказалось
+        ближе к целому числу, чем эта погрешность, оно пересчитывается функцией average по исходным значениям.
+        Для пересчёта вакансии один раз устойчиво сортируются по ключу, и каждая группа берётся срезом
+        в исходном порядке строк.
+
+            Args:
+                keys (np.ndarray): ключи групп
+                counts (np.ndarray): количество вакансий в группах
+                sums (np.ndarray): суммы зарплат в группах
+                key_column (np.ndarray): ключ каждой вакансии
+                salaries (np.ndarray): зарплата каждой вакансии
+                average: построчная функция среднего для пересчёта
+
+            Returns:
+                dict: средняя зарплата по ключу
+        """
+        averages = sums / np.maximum(counts, 1)
+        tolerance = 4 * counts * np.finfo(np.float64).eps * np.abs(averages)
+        is_near_integer = np.abs(averages - np.round(averages)) <= tolerance
+        result = dict(zip(keys.tolist(), averages.astype(np.int64).tolist()))
+        near_keys = keys[is_near_integer]
+        if len(near_keys) == 0:
+            return result
+        order = np.argsort(key_column, kind='stable')
+        sorted_keys = key_column[order]
+        starts = np.searchsorted(sorted_keys, near_keys, side='left')
+        ends = np.searchsorted(sorted_keys, near_keys, side='right')
+        for key, start, end in zip(near_keys.tolist(), starts.tolist(), ends.tolist()):
+            result[key] = average(salaries[order[start:end]].tolist())
+        return result
+
+    def calculate_highest_average_salary(self, list_all_salary):
         """"Высчитать самую высокую среднюю зарплату
 
             Args:
@@ -307,70 +1416,119 @@ class Constractor:
             Returns:
                 tuple: (высшая зарплата, фильтр списка городов)
         """
-        average_salary_values = []
-        town_tracker = {}
-        for i in range(len(list_all_salary.salary_dict)):
-            town = list(list_all_salary.salary_dict)[i]
-            town_tracker[town] = len(list(list_all_salary.salary_dict.values())[i])
-            average = int(sum(list(list_all_salary.salary_dict.values())[i]) / 
-                       len(list(list_all_salary.salary_dict.values())[i]))
-            average_salary_values.append((town, average))
-
-        del_for_towns = []
-        del_town_index = []
-        for i in range(len(town_tracker.items())):
-            town = list(town_tracker)[i]
-            percentage = round(100 * int(list(town_tracker.values())[i]) / sum(town_tracker.values()), 1)
-            if percentage < 1 or town == 'Россия':
-                del_for_towns.append((town, list(town_tracker.values())[i]))
-                del_town_index.append(i)
-
-        for i in reversed(range(len(del_for_towns))):
-            del town_tracker[del_for_towns[i][0]]
-            del average_salary_values[del_town_index[i]]
-
-        top_aver_salary = dict(sorted(average_salary_values, key=lambda row: row[1], reverse=True))
-        big_salary_dict = {}
-        for key, value in top_aver_salary.items():
-            big_salary_dict[key] = value
-        return {x: big_salary_dict[x] for x in list(big_salary_dict)[:10]}, del_for_towns
+        town_stats = [(town, amount, int(total / amount)) for town, amount, total in list_all_salary.get_salary_stats()]
+        return self.town_ranking.rank_salaries(town_stats, sum(amount for town, amount, average in town_stats))
 
-    @staticmethod
-    def find_highest_town_rating(town_job_rating):
+    def find_highest_town_rating(self, town_job_rating):
         """Найти рейтинговую пропорцию профессии по городам
 
             Args:
                 town_job_rating: рейтинг профессии по городам
 
             Returns:
-                dict: отсортированный словарь пропорции
+                list: пары (город, пропорция) по убыванию пропорции
         """
-        del_for_towns = []
-        for i in reversed(range(len(del_for_towns))):
-            del town_job_rating.amount_dict[del_for_towns[i][0]]
-        for i in range(len(town_job_rating.amount_dict.keys())):
-            if 'Россия' in town_job_rating.amount_dict.keys():
-                del town_job_rating.amount_dict['Россия']
+        return self.town_ranking.rank_proportions(town_job_rating.amount_dict.items(), town_job_rating.length)
 
-        proportion_dict = {}
-        
-        for key, value in town_job_rating.amount_dict.items():
-            proportion = value / town_job_rating.length
-            if proportion >= 0.01:
-                proportion_dict[key] = round(proportion, 4)
 
-        sorted_dict = sorted(proportion_dict.items(), key=lambda row: row[1], reverse=True)
-        return sorted_dict[:10]
+class VacancyDetails:
+    """Построчная выгрузка вакансий выбранной профессии: название, город, год и зарплата в рублях
+
+    Строки пишутся во временный csv-файл по мере подсчёта статистики, поэтому в памяти не хранится
+    список совпавших вакансий. При выгрузке строки переносятся третьим листом в report.xlsx, а если их
+    больше, чем помещается на лист Excel, временный файл становится файлом vacancies.csv рядом с отчётом.
+    """
+    excel_rows_limit = 1048575
+    titles = ['Вакансия', 'Город', 'Год', 'Зарплата в рублях']
+
+    def __init__(self, directory='.'):
+        """Инициализация объекта VacancyDetails
+
+            Args:
+                directory (str): папка для временного файла; лучше та же, что и у отчёта
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile('w', encoding='utf-8-sig', newline='', suffix='.csv',
+                                                prefix='.vacancies-', dir=directory, delete=False)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.titles)
+        self.count = 0
+
+    def append(self, name, area_name, year, salary):
+        """Добавить вакансию
+
+            Args:
+                name (str): название вакансии
+                area_name (str): город
+                year (int): год публикации
+                salary (float): зарплата в рублях
+        """
+        self.writer.writerow((name, area_name, year, salary))
+        self.count += 1
+
+    def extend(self, rows):
+        """Добавить вакансии
+
+            Args:
+                rows (list): строки (название, город, год, зарплата в рублях)
+        """
+        rows = list(rows)
+        self.writer.writerows(rows)
+        self.count += len(rows)
+
+    def read_rows(self):
+        """Перебрать записанные вакансии
+
+            Yields:
+                list: [название, город, год, зарплата в рублях]
+        """
+        self.file.flush()
+        with open(self.file.name, encoding='utf-8-sig', newline='') as file:
+            rows = csv.reader(file)
+            next(rows, None)
+            for name, area_name, year, salary in rows:
+                yield [name, area_name, int(year), float(salary)]
+
+    def export(self, output_dir, excel_writer=None):
+        """Выгрузить вакансии листом книги или, если их больше лимита Excel или книги нет, файлом vacancies.csv
+
+            Args:
+                output_dir (str): папка отчёта
+                excel_writer (ExcelWriter): книга отчёта
+
+            Returns:
+                str: путь к vacancies.csv или None, если вакансии записаны в книгу
+        """
+        if excel_writer is not None and self.count <= self.excel_rows_limit:
+            sheet = excel_writer.create_sheet('Вакансии', self.titles, number_formats={4: '#,##0.00'})
+            for row in self.read_rows():
+                sheet.append(row)
+            return None
+        self.file.close()
+        csv_file = os.path.join(output_dir, 'vacancies.csv')
+        os.replace(self.file.name, csv_file)
+        return csv_file
+
+    def close(self):
+        """Закрыть и удалить временный файл, если он не стал файлом vacancies.csv"""
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
+
+
+pdf_backends = ('reportlab', 'wkhtmltopdf')
+wkhtmltopdf_windows_path = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
 
 
 class CreateReport:
     """Класс для создания отчёта"""
-    def __init__(self, data, prof):
+    def __init__(self, data, prof, output_dir='.'):
         """Инициализация объекта CreateReport
 
             Args:
                 data: полученные в ходе подсчётов данные
                 prof (str): название профессии
+                output_dir (str): папка для report.xlsx, graph.png и report.pdf
         """
         self.year_salary = data[0]
         self.year_vacancy_amount = data[1]
@@ -379,163 +1537,138 @@ class CreateReport:
         self.town_salary = data[4]
         self.town_job_rating = data[5]
         self.prof = prof
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
 
-        self.wb = Workbook()
-        self.sheet1 = self.wb.active
-        self.sheet1.title = 'Статистика по годам'
-        self.sheet2 = self.wb.create_sheet('Статистика по городам')
-
-        self.fig = plt.figure()
-        self.ax1 = self.fig.add_subplot(221)
-        self.ax1.set_title('Уровень зарплат по годам')
-        self.ax2 = self.fig.add_subplot(222)
-        self.ax2.set_title('Количество вакансий по годам')
-        self.ax3 = self.fig.add_subplot(223)
-        self.ax3.set_title('Уровень зарплат по городам')
-        self.ax4 = self.fig.add_subplot(224)
-        self.ax4.set_title('Доля вакансий по городам')
-
-    def create_excel_sheets(self):
-        """Создать файл Excel"""
-        names_sheet1 = ['Год', 'Средняя зарплата', f'Средняя зарплата - {self.prof}',
-                        'Количество вакансий', f'Количество вакансий - {self.prof}']
-        names_sheet2 = ['Город', 'Уровень зарплат', 'Город', 'Доля вакансий']
+    @classmethod
+    def from_columns(cls, columns, prof):
+        """Подсчитать статистику по колоночному хранилищу и подготовить по ней отчёт
 
-        for i, name in enumerate(names_sheet1):
-            self.sheet1.cell(row=1, column=(i + 1), value=name).font = Font(bold=True)
-        for year, value in self.year_salary.items():
-            self.sheet1.append([year, value, self.year_vacancy_salary[year], self.year_vacancy_amount[year],
-                                self.year_position_vacancy_amount[year]])
+            Args:
+                columns (VacancyColumns): вакансии в виде типизированных массивов
+                prof (str): название профессии
+
+            Returns:
+                CreateReport: объект отчёта
+        """
+        return cls(Constractor().compile_data(columns, prof), prof)
 
-        for i, name in enumerate(names_sheet2):
-            self.sheet2.cell(row=1, column=(i + 1), value=name).font = Font(bold=True)
-        for i in range(len(list(self.town_salary.keys()))):
-            self.sheet2.append([list(self.town_salary.keys())[i], list(self.town_salary.values())[i],
-                                list(self.town_job_rating.keys())[i], list(self.town_job_rating.values())[i]])
+    def create_excel_sheets(self, details=None):
+        """Создать файл Excel потоковой записью write-only листов
+
+            Args:
+                details (VacancyDetails): вакансии профессии для третьего листа или файла vacancies.csv
+        """
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+        from excel_writer import ExcelWriter
 
-        cell_border = Side(border_style='thin', color='000000')
-        self.set_border(self.sheet1, cell_border)
-        self.set_border(self.sheet2, cell_border)
-        self.sheet2.insert_cols(3)
-        self.sheet2.column_dimensions['C'].width = 2
+        names_sheet1, names_sheet2 = self.get_table_names()
 
-        self.calculate_column_width(self.sheet1)
-        self.calculate_column_width(self.sheet2)
+        excel_writer = ExcelWriter()
+        sheet1 = excel_writer.create_sheet('Статистика по годам', names_sheet1)
+        for year, value in self.year_salary.items():
+            sheet1.append([year, value, self.year_vacancy_salary[year], self.year_vacancy_amount[year],
+                           self.year_position_vacancy_amount[year]])
 
-        for i in range(2, len(self.sheet2['E']) + 1):
-            self.sheet2[f'E{i}'].number_format = FORMAT_PERCENTAGE_00
+        sheet2 = excel_writer.create_sheet('Статистика по городам', names_sheet2,
+                                           number_formats={5: FORMAT_PERCENTAGE_00}, spacer_columns=[3])
+        for row in self.get_town_rows():
+            sheet2.append(row)
 
-        self.wb.save('report.xlsx')
+        if details is not None:
+            details.export(self.output_dir, excel_writer)
 
-    @staticmethod
-    def set_border(ws, cell_border):
-        """Установить границы таблицы Excel
+        excel_writer.save(os.path.join(self.output_dir, 'report.xlsx'))
 
-            Args:
-                ws: рабочая плоскость
-                cell_border (int): граница
-        """
-        for cell in ws._cells.values():
-            cell.border = Border(top=cell_border, bottom=cell_border, left=cell_border, right=cell_border)
+    def get_town_rows(self):
+        """Перебрать строки статистики по городам за один проход по обоим рейтингам
 
-    @staticmethod
-    def calculate_column_width(ws):
-        """Посчитать ширину колонки
+        Строк столько же, сколько городов в рейтинге зарплат; если в рейтинге долей городов меньше,
+        недостающие ячейки остаются пустыми.
 
-            Args:
-                ws: рабочая плоскость
+            Yields:
+                list: [город, уровень зарплат, город, доля вакансий]
         """
-        dimension_dict = {}
-        for row in ws.rows:
-            for cell in row:
-                if cell.value:
-                    dimension_dict[cell.column_letter] = max((dimension_dict.get(cell.column_letter, 0), len(str(cell.value))))
-        for column_var, value in dimension_dict.items():
-            ws.column_dimensions[column_var].width = value + 2
+        town_job_rating = iter(self.town_job_rating.items())
+        for town, salary in self.town_salary.items():
+            yield [town, salary, *next(town_job_rating, (None, None))]
 
     def create_image(self):
-        """Создать картинку со статистическими данными"""
-        width_12 = 0.4
-        x_nums_1 = np.arange(len(self.year_salary.keys()))
-        x_list1_1 = x_nums_1 - width_12 / 2
-        x_list1_2 = x_nums_1 + width_12 / 2
-
-        self.ax1.bar(x_list1_1, self.year_salary.values(), width_12, label='средняя з/п')
-        self.ax1.bar(x_list1_2, self.year_vacancy_salary.values(), width_12, label=f'з/п {self.prof}')
-        self.ax1.set_xticks(x_nums_1, self.year_salary.keys(), rotation='vertical')
-        self.ax1.tick_params(axis='both', labelsize=8)
-        self.ax1.legend(fontsize=8)
-        self.ax1.grid(True, axis='y')
-
-        x_nums_2 = np.arange(len(self.year_vacancy_amount.keys()))
-        x_list2_1 = x_nums_2 - width_12 / 2
-        x_list2_2 = x_nums_2 + width_12 / 2
-
-        self.ax2.bar(x_list2_1, self.year_vacancy_amount.values(), width_12, label='Количество вакансий')
-        self.ax2.bar(x_list2_2, self.year_position_vacancy_amount.values(), width_12, label=f'Количество вакансий\n{self.prof}')
-        self.ax2.set_xticks(x_nums_2, self.year_vacancy_amount.keys(), rotation='vertical')
-        self.ax2.tick_params(axis='both', labelsize=8)
-        self.ax2.legend(fontsize=8)
-        self.ax2.grid(True, axis='y')
-
-        img_titles = {}
-        self.apply_attributes(img_titles)
-
-        width_3 = 0.7
-        y_nums = np.arange(len(list(img_titles.keys())))
-
-        self.ax3.barh(y_nums, img_titles.values(), width_3, align='center')
-        self.ax3.set_yticks(y_nums, img_titles.keys())
-        self.ax3.tick_params(axis='y', labelsize=6)
-        self.ax3.tick_params(axis='x', labelsize=8)
-        self.ax3.invert_yaxis()
-        self.ax3.grid(True, axis='x')
-
-        other = 1
-        data = [1]
-        labels = ['Другие']
-        for key, value in self.town_job_rating.items():
-            data.append(value * 100)
-            labels.append(key)
-            other -= value
-        data[0] = round(other, 4) * 100
-        textprops = {"fontsize": 6}
+        """Создать картинку со статистическими данными на Agg-холсте, без состояния pyplot"""
+        from chart_renderer import render_chart
 
-        self.ax4.pie(data, labels=labels, textprops=textprops, radius=1.1)
+        render_chart(self.get_chart_data(), self.prof, os.path.join(self.output_dir, 'graph.png'))
 
-        plt.tight_layout()
-        plt.savefig('graph.png')
+    def get_chart_data(self):
+        """Собрать данные для графиков
 
-    def apply_attributes(self, img_titles):
-        """Задать параметры текста на картинке
+            Returns:
+                tuple: данные статистики в порядке Constractor.assemble_data
+        """
+        return self.year_salary, self.year_vacancy_amount, self.year_vacancy_salary, \
+            self.year_position_vacancy_amount, self.town_salary, self.town_job_rating
+
+    def create_pdf(self, backend='reportlab'):
+        """Создать PDF-файл по всей статистике; картинка графиков graph.png должна быть уже создана
 
             Args:
-                img_titles (str): заголовки пунктов на картинках
+                backend (str): reportlab - нарисовать PDF в текущем процессе; wkhtmltopdf - отрисовать
+                    pdf_template.html внешней программой wkhtmltopdf через pdfkit
+
+            Raises:
+                ReportError: неизвестный способ создания PDF или не найдена программа wkhtmltopdf
         """
-        for key, value in self.town_salary.items():
-            if ' ' in key:
-                key = str(key).replace(' ', '\n')
-            elif '-' in key and key.count('-') == 1:
-                key = str(key).replace('-', '-\n')
-            elif '-' in key and key.count('-') != 1:
-                key = str(key).replace('-', '-\n', 1)
-            img_titles[key] = value
+        if backend not in pdf_backends:
+            raise ReportError(f'Неизвестный способ создания PDF: {backend}')
+        if backend == 'wkhtmltopdf':
+            self.create_html_pdf()
+            return
+        from pdf_renderer import render_report_pdf
+
+        names_sheet1, names_sheet2 = self.get_table_names()
+        year_rows = [[year, value, self.year_vacancy_salary[year], self.year_vacancy_amount[year],
+                      self.year_position_vacancy_amount[year]] for year, value in self.year_salary.items()]
+        town_rows = [[town, salary, rating_town, None if rating is None else f'{round(rating * 100, 2)}%']
+                     for town, salary, rating_town, rating in self.get_town_rows()]
+        render_report_pdf(os.path.join(self.output_dir, 'report.pdf'), self.prof,
+                          os.path.join(self.output_dir, 'graph.png'), (names_sheet1, year_rows),
+                          (names_sheet2, town_rows))
+
+    def get_table_names(self):
+        """Получить заголовки таблиц статистики по годам и по городам
 
-    def create_pdf(self):
-        """Создать PDF-файл по всей статистике"""
-        new_environment = Environment(loader=FileSystemLoader('.'))
-        template = new_environment.get_template('pdf_template.html')
+            Returns:
+                tuple: (заголовки статистики по годам, заголовки статистики по городам)
+        """
         names_sheet1 = ['Год', 'Средняя зарплата', f'Средняя зарплата - {self.prof}',
                         'Количество вакансий', f'Количество вакансий - {self.prof}']
         names_sheet2 = ['Город', 'Уровень зарплат', 'Город', 'Доля вакансий']
-        town_stats_compilation = []
-        for i in range(len(list(self.town_salary.keys()))):
-            town_stats_compilation.append([list(self.town_salary.keys())[i], list(self.town_job_rating.keys())[i]])
+        return names_sheet1, names_sheet2
+
+    def create_html_pdf(self):
+        """Создать PDF-файл из pdf_template.html программой wkhtmltopdf
+
+        Программа ищется в PATH, а если её там нет - в папке установки по умолчанию в Windows.
+
+            Raises:
+                ReportError: программа wkhtmltopdf не найдена
+        """
+        from jinja2 import Environment, FileSystemLoader
+        import pdfkit
+
+        wkhtmltopdf = shutil.which('wkhtmltopdf') or shutil.which(wkhtmltopdf_windows_path)
+        if wkhtmltopdf is None:
+            raise ReportError('Не найдена программа wkhtmltopdf')
+        new_environment = Environment(loader=FileSystemLoader('.'))
+        template = new_environment.get_template('pdf_template.html')
+        names_sheet1, names_sheet2 = self.get_table_names()
+        town_stats_compilation = [[town, rating_town] for town, salary, rating_town, rating in self.get_town_rows()]
         for key, value in self.town_job_rating.items():
             self.town_job_rating[key] = str(round(value * 100, 2)) + '%'
         pdf_template = self.create_pdf_template(names_sheet1, names_sheet2, template, town_stats_compilation)
-        config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options={"enable-local-file-access": ""})
+        config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf)
+        pdfkit.from_string(pdf_template, os.path.join(self.output_dir, 'report.pdf'), configuration=config,
+                           options={"enable-local-file-access": ""})
 
     def create_pdf_template(self, names_sheet1, names_sheet2, template, town_stats_compilation):
         """Создать шаблон
@@ -556,23 +1689,561 @@ class CreateReport:
                                         'town_salary': self.town_salary,
                                         'town_job_rating': self.town_job_rating,
                                         'names_sheet1': names_sheet1,
-                                        'names_sheet2': names_sheet2})
+                                        'names_sheet2': names_sheet2,
+                                        'graph': os.path.abspath(os.path.join(self.output_dir, 'graph.png'))})
         return pdf_template
 
 
-def generate_output(data_vacancies, position_title):
+def split_file(file_name, shards_amount):
+    """Разбить csv-файл на диапазоны байтов, каждый из которых начинается с новой строки
+
+    Границы верны, только если одна вакансия занимает одну строку файла, как в выгрузках hh.ru; вакансии
+    из нескольких строк находит read_shard_rows.
+
+        Args:
+            file_name (str): название файла
+            shards_amount (int): желаемое количество диапазонов
+
+        Returns:
+            tuple: (заголовки колонок, список пар (начало, конец) в байтах)
+    """
+    with open(file_name, 'rb') as file:
+        header = file.readline()
+        start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        bounds = [start]
+        for i in range(1, shards_amount):
+            position = start + (size - start) * i // shards_amount
+            if position <= bounds[-1]:
+                continue
+            file.seek(position - 1)
+            file.readline()
+            bounds.append(min(file.tell(), size))
+        bounds.append(size)
+    column_headers = next(csv.reader([header.decode('utf_8_sig')]), None)
+    shards = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+    return column_headers, shards
+
+
+def read_shard_rows(file_name, start, end, column_headers, allow_multiline=False):
+    """Построчно считать корректные строки вакансий из диапазона байтов файла
+
+    Строка файла с нечётным числом кавычек открывает или закрывает значение в кавычках, перенесённое на
+    следующую строку. Такая вакансия может пересекать границу диапазона, поэтому без allow_multiline
+    чтение прерывается ошибкой, а не теряет или разрезает вакансию.
+
+        Args:
+            file_name (str): название файла
+            start (int): начало диапазона
+            end (int): конец диапазона
+            column_headers (list): заголовки колонок
+            allow_multiline (bool): диапазон точно начинается и заканчивается на границе вакансий
+
+        Yields:
+            list: строка вакансии, в которой заполнены все колонки
+
+        Raises:
+            MultilineRowError: в диапазоне есть вакансия из нескольких строк, а allow_multiline не задан
+    """
+    with open(file_name, 'rb') as file:
+        file.seek(start)
+
+        def read_lines():
+            position = start
+            for line in iter(file.readline, b''):
+                if position >= end:
+                    break
+                if not allow_multiline and line.count(b'"') % 2:
+                    raise MultilineRowError(f'В файле {file_name} есть вакансия из нескольких строк')
+                position += len(line)
+                yield line.decode('utf-8')
+
+        for row in csv.reader(read_lines()):
+            if len(row) == len(column_headers) and row.count('') == 0:
+                yield row
+
+
+def aggregate_shard(file_name, start, end, column_headers, prof, allow_multiline=False):
+    """Посчитать частичную статистику по диапазону байтов файла
+
+        Args:
+            file_name (str): название файла
+            start (int): начало диапазона
+            end (int): конец диапазона
+            column_headers (list): заголовки колонок
+            prof (str): название профессии
+            allow_multiline (bool): диапазон точно начинается и заканчивается на границе вакансий
+
+        Returns:
+            Constractor: накопленная статистика по диапазону
+
+        Raises:
+            MultilineRowError: в диапазоне есть вакансия из нескольких строк, а allow_multiline не задан
+    """
+    constractor = Constractor(accumulate=True)
+    rows = read_shard_rows(file_name, start, end, column_headers, allow_multiline)
+    constractor.calculate_stat_values(prof, (Vacancy(dict(zip(column_headers, row))) for row in rows))
+    return constractor
+
+
+def compile_data_parallel(file_name, prof, workers=None):
+    """Посчитать статистику по файлу в нескольких процессах и объединить частичные результаты
+
+    Если в файле есть вакансия из нескольких строк, границы диапазонов могут её разрезать, поэтому статистика
+    считается заново одним процессом по всему файлу.
+
+    Средние по городам считаются по сложенным суммам float частей, поэтому средняя зарплата города может
+    отличаться на единицу от однопроцессного подсчёта, если частное отстоит от целого числа меньше чем
+    на погрешность округления.
+
+        Args:
+            file_name (str): название файла
+            prof (str): название профессии
+            workers (int): количество процессов, по умолчанию - количество ядер
+
+        Returns: tuple: статистика в порядке Constractor.compile_data
+    """
+    workers = workers or os.cpu_count()
+    column_headers, shards = split_file(file_name, workers * 4)
+    if column_headers is None:
+        raise ReportError('Пустой файл')
+    constractor = Constractor(accumulate=True)
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            starts, ends = [shard[0] for shard in shards], [shard[1] for shard in shards]
+            for partial in executor.map(aggregate_shard, repeat(file_name), starts, ends, repeat(column_headers),
+                                        repeat(prof)):
+                constractor.merge(partial)
+    except MultilineRowError:
+        data_set = DataSet(file_name, stream=True)
+        vacancies = (Vacancy(dict(zip(data_set.columns_names, row))) for row in data_set.vacancies_data)
+        return Constractor(accumulate=True).compile_data(vacancies, prof)
+    if constractor.year_vacancy_amount.length == 0:
+        raise ReportError('Нет данных')
+    return constractor.assemble_data()
+
+
+def aggregate_year_file(file_name, prof, rates=None):
+    """Посчитать статистику по csv-файлу одного года из папки years_data
+
+        Args:
+            file_name (str): файл года
+            prof (str): название профессии
+            rates (CurrencyRates): курсы валют по месяцам; None - постоянные курсы currency_to_rub
+
+        Returns:
+            Constractor: накопленная статистика по году
+    """
+    constractor = Constractor(accumulate=True, rates=rates)
+    with open(file_name, encoding='utf_8_sig') as file:
+        rows = csv.reader(file)
+        column_headers = next(rows, None)
+        if column_headers is not None:
+            vacancies = (Vacancy(dict(zip(column_headers, row))) for row in rows
+                         if len(row) == len(column_headers) and row.count('') == 0)
+            constractor.calculate_stat_values(prof, vacancies)
+    return constractor
+
+
+def aggregate_year_files(prof, directory='years_data', workers=None, rates=None):
+    """Посчитать статистику по каждому файлу года в отдельном процессе
+
+        Args:
+            prof (str): название профессии
+            directory (str): папка с файлами по годам
+            workers (int): количество процессов, по умолчанию - количество ядер
+            rates (CurrencyRates): курсы валют по месяцам; None - постоянные курсы currency_to_rub
+
+        Returns:
+            list: пары (файл года, Constractor) в порядке возрастания года
+    """
+    year_files = sorted(glob.glob(os.path.join(glob.escape(directory), '*.csv')))
+    with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+        return list(zip(year_files, executor.map(aggregate_year_file, year_files, repeat(prof), repeat(rates))))
+
+
+def compile_years_parallel(prof, directory='years_data', workers=None):
+    """Посчитать статистику по файлам годов параллельно и объединить статистику по городам
+
+    Годы в результате идут по возрастанию, а не в порядке первой встречи в общей выгрузке, поэтому
+    города с одинаковым значением могут стоять в другом порядке, чем при однопроцессном подсчёте.
+    Средние по городам считаются по сложенным суммам float файлов годов и так же, как в
+    compile_data_parallel, могут отличаться на единицу в пограничных случаях.
+
+        Args:
+            prof (str): название профессии
+            directory (str): папка с файлами по годам, созданная DataSet.parse_csv
+            workers (int): количество процессов, по умолчанию - количество ядер
+
+        Returns: tuple: статистика в порядке Constractor.compile_data
+    """
+    constractor = Constractor(accumulate=True)
+    for year_file, partial in aggregate_year_files(prof, directory, workers):
+        constractor.merge(partial)
+    if constractor.year_vacancy_amount.length == 0:
+        raise ReportError('Нет данных')
+    return constractor.assemble_data()
+
+
+def get_stats_hash(data, prof):
+    """Хэш содержимого статистики: совпадает, только если совпадают все значения и порядок ключей
+
+        Args:
+            data (tuple): данные статистики в порядке Constractor.assemble_data
+            prof (str): название профессии
+
+        Returns:
+            str: sha256 в шестнадцатеричном виде
+    """
+    content = json.dumps([prof, [list(values.items()) for values in data]], ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def create_year_charts(prof, directory='years_data', output_dir='year_charts', workers=None, rates=None):
+    """Нарисовать по каждому файлу года набор SVG-графиков: уровень зарплат, количество вакансий,
+    зарплаты и доли вакансий по городам
+
+    Статистика годов считается и графики рисуются в процессах пула. Хэши статистики нарисованных годов хранятся
+    в charts_manifest.json папки графиков; год, хэш статистики которого не изменился и все файлы которого на месте,
+    не перерисовывается. Годы из манифеста, которых больше нет в папке файлов по годам, удаляются вместе с папками
+    их графиков.
+
+        Args:
+            prof (str): название профессии
+            directory (str): папка с csv-файлами по годам
+            output_dir (str): папка, в которой для каждого года создаётся своя папка с графиками
+            workers (int): количество процессов, по умолчанию - количество ядер
+            rates (CurrencyRates): курсы валют по месяцам; None - постоянные курсы currency_to_rub
+
+        Returns:
+            list: годы, графики которых были нарисованы заново
+    """
+    from chart_renderer import get_bundle_files, render_bundles
+
+    manifest_file = os.path.join(output_dir, 'charts_manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, encoding='utf-8') as file:
+            manifest = json.load(file)
+    stats_hashes = {}
+    jobs = []
+    for year_file, constractor in aggregate_year_files(prof, directory, workers, rates):
+        if constractor.year_vacancy_amount.length == 0:
+            continue
+        year = os.path.splitext(os.path.basename(year_file))[0]
+        data = constractor.assemble_data()
+        year_dir = os.path.join(output_dir, year)
+        stats_hashes[year] = get_stats_hash(data, prof)
+        if manifest.get(year) == stats_hashes[year] and all(map(os.path.exists, get_bundle_files(year_dir))):
+            continue
+        jobs.append((data, prof, year_dir))
+    render_bundles(jobs, workers)
+    for year in set(manifest) - set(stats_hashes):
+        shutil.rmtree(os.path.join(output_dir, year), ignore_errors=True)
+    os.makedirs(output_dir, exist_ok=True)
+    temp_file = f'{manifest_file}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump(stats_hashes, file, ensure_ascii=False, indent=1)
+    os.replace(temp_file, manifest_file)
+    return [os.path.basename(year_dir) for data, prof, year_dir in jobs]
+
+
+class StatSnapshot:
+    """Снимок накопленной статистики по профессии, который дополняется только новыми строками файлов
+
+    В одном файле снимка хранится отдельный раздел для каждой профессии, поэтому отчёт по другой профессии
+    не сбрасывает уже накопленную историю.
+    """
+    head_size = 65536
+
+    def __init__(self, snapshot_file, prof):
+        """Инициализация объекта StatSnapshot; если снимок для этой профессии уже есть, он загружается
+
+            Args:
+                snapshot_file (str): файл снимка
+                prof (str): название профессии
+        """
+        self.snapshot_file = snapshot_file
+        self.prof = prof
+        self.constractor = Constractor(accumulate=True)
+        self.sources = {}
+        section = self.read_sections().get(prof)
+        if section is not None:
+            self.constractor = Constractor.from_state(section['state'])
+            self.sources = section['sources']
+
+    def read_sections(self):
+        """Прочитать разделы всех профессий из файла снимка
+
+            Returns:
+                dict: профессия -> {'sources': прочитанные файлы, 'state': состояние Constractor}
+        """
+        if not os.path.exists(self.snapshot_file):
+            return {}
+        with open(self.snapshot_file, encoding='utf-8') as file:
+            snapshot = json.load(file)
+        return snapshot['profs']
+
+    def update(self, file_names):
+        """Добавить в снимок строки, появившиеся в файлах с прошлого запуска
+
+        Новый файл читается целиком, у уже известного - только дописанный хвост. Если начало известного
+        файла или блок перед сохранённой позицией изменились либо файл стал короче, снимок пересобирается
+        по всем известным файлам.
+
+            Args:
+                file_names (list): файлы с вакансиями
+        """
+        file_names = [os.path.abspath(file_name) for file_name in file_names]
+        if any(not self.is_appended(file_name) for file_name in file_names if file_name in self.sources):
+            file_names = [file_name for file_name in self.sources if os.path.exists(file_name)] + \
+                         [file_name for file_name in file_names if file_name not in self.sources]
+            self.constractor = Constractor(accumulate=True)
+            self.sources = {}
+        for file_name in file_names:
+            self.read_new_rows(file_name)
+
+    def is_appended(self, file_name):
+        """Проверить, что известный файл только дописывался с прошлого запуска
+
+            Args:
+                file_name (str): путь к файлу
+
+            Returns:
+                bool: можно ли дочитать только хвост файла
+        """
+        source = self.sources[file_name]
+        return os.path.getsize(file_name) >= source['offset'] and \
+            self.hash_head(file_name, source['offset']) == source['head_hash'] and \
+            self.hash_tail(file_name, source['offset']) == source['tail_hash']
+
+    def read_new_rows(self, file_name):
+        """Дочитать файл с сохранённой позиции до последней полной строки
+
+            Args:
+                file_name (str): путь к файлу
+        """
+        column_headers, shards = split_file(file_name, 1)
+        if column_headers is None:
+            return
+        start = self.sources[file_name]['offset'] if file_name in self.sources else \
+            shards[0][0] if shards else os.path.getsize(file_name)
+        end = self.find_last_line_end(file_name, start)
+        if end > start:
+            self.constractor.merge(aggregate_shard(file_name, start, end, column_headers, self.prof,
+                                                   allow_multiline=True))
+        offset = max(start, end)
+        self.sources[file_name] = {'offset': offset, 'head_hash': self.hash_head(file_name, offset),
+                                   'tail_hash': self.hash_tail(file_name, offset)}
+
+    @staticmethod
+    def find_last_line_end(file_name, start):
+        """Найти конец последней полной вакансии файла, чтобы не читать недописанную вакансию
+
+        Файл просматривается от start, который всегда стоит на границе вакансий, с подсчётом кавычек:
+        перевод строки внутри значения в кавычках не считается концом вакансии.
+
+            Args:
+                file_name (str): путь к файлу
+                start (int): позиция начала вакансии, раньше которой искать не нужно
+
+            Returns:
+                int: позиция сразу после последнего перевода строки вне кавычек
+        """
+        end = start
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            position = start
+            is_quoted = False
+            for line in iter(file.readline, b''):
+                position += len(line)
+                is_quoted ^= line.count(b'"') % 2 == 1
+                if not is_quoted and line.endswith(b'\n'):
+                    end = position
+        return end
+
+    @classmethod
+    def hash_head(cls, file_name, offset):
+        """Хэш начала файла, по которому видно, что файл не переписали
+
+            Args:
+                file_name (str): путь к файлу
+                offset (int): сколько байт файла уже прочитано
+
+            Returns:
+                str: sha1 первых min(offset, head_size) байт
+        """
+        with open(file_name, 'rb') as file:
+            return hashlib.sha1(file.read(min(offset, cls.head_size))).hexdigest()
+
+    @classmethod
+    def hash_tail(cls, file_name, offset):
+        """Хэш блока, которым заканчивается прочитанная часть файла, по которому видно правку конца файла
+
+            Args:
+                file_name (str): путь к файлу
+                offset (int): сколько байт файла уже прочитано
+
+            Returns:
+                str: sha1 последних min(offset, head_size) байт перед offset
+        """
+        start = max(offset - cls.head_size, 0)
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            return hashlib.sha1(file.read(offset - start)).hexdigest()
+
+    def save(self):
+        """Сохранить раздел профессии, не меняя разделы других профессий, и заменить файл снимка целиком"""
+        sections = self.read_sections()
+        sections[self.prof] = {'sources': self.sources, 'state': self.constractor.to_state()}
+        temp_file = f'{self.snapshot_file}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump({'profs': sections}, file)
+        os.replace(temp_file, self.snapshot_file)
+
+
+def update_report(file_names, prof, snapshot_file='stat_snapshot.json'):
+    """Дополнить снимок статистики новыми вакансиями и пересоздать по нему report.xlsx, graph.png и report.pdf
+
+    Суммы float по городам складываются из сумм отдельных запусков, поэтому средняя зарплата города может
+    отличаться на единицу от подсчёта всех файлов за один проход, если частное почти целое.
+
+        Args:
+            file_names (list): файлы с вакансиями - растущая выгрузка или ежедневные файлы
+            prof (str): название профессии
+            snapshot_file (str): файл снимка статистики
+
+        Returns: tuple: статистика в порядке Constractor.compile_data по всем прочитанным вакансиям
+    """
+    snapshot = StatSnapshot(snapshot_file, prof)
+    snapshot.update(file_names)
+    snapshot.save()
+    if snapshot.constractor.year_vacancy_amount.length == 0:
+        raise ReportError('Нет данных')
+    data = snapshot.constractor.assemble_data()
+    report = CreateReport(data, prof)
+    report.create_excel_sheets()
+    report.create_image()
+    report.create_pdf()
+    return data
+
+
+def get_file_fingerprint(file_name, block_size=1 << 20):
+    """Отпечаток файла: размер, время изменения и хэш содержимого
+
+    Для больших файлов хэшируются первый, средний и последний блоки, чтобы не читать файл целиком.
+
+        Args:
+            file_name (str): путь к файлу
+            block_size (int): размер хэшируемого блока в байтах
+
+        Returns:
+            str: отпечаток, пригодный для имени файла
+    """
+    stat = os.stat(file_name)
+    content_hash = hashlib.sha1(str(stat.st_size).encode())
+    with open(file_name, 'rb') as file:
+        if stat.st_size <= 3 * block_size:
+            content_hash.update(file.read())
+        else:
+            for position in (0, (stat.st_size - block_size) // 2, stat.st_size - block_size):
+                file.seek(position)
+                content_hash.update(file.read(block_size))
+    return f'{stat.st_size}-{stat.st_mtime_ns}-{content_hash.hexdigest()[:16]}'
+
+
+def load_vacancy_columns(file_name, cache_dir='vacancy_cache', memmap=True):
+    """Получить колонки вакансий из кэша, а если файл изменился или ещё не разбирался - разобрать csv
+
+    Кэш ищется по отпечатку файла, поэтому изменённый файл автоматически разбирается заново,
+    а устаревшие записи кэша для него удаляются. В имя записи входит хэш абсолютного пути, поэтому
+    одноимённые выгрузки из разных папок не вытесняют кэш друг друга. Записи кэша подменяются целиком,
+    поэтому несколько отчётов по одному файлу можно строить одновременно.
+
+        Args:
+            file_name (str): путь к csv-файлу
+            cache_dir (str): папка кэша; None - разобрать csv без кэша
+            memmap (bool): хранить кэш папкой npy-файлов и открывать через np.memmap, иначе - одним npz-файлом
+
+        Returns:
+            VacancyColumns: вакансии в виде типизированных массивов
+    """
+    if cache_dir is None:
+        return DataSet(file_name, stream=True).to_columns()
+    path_hash = hashlib.sha1(os.path.abspath(file_name).encode('utf-8')).hexdigest()[:12]
+    cache_prefix = os.path.join(cache_dir, f'{os.path.basename(file_name)}.{path_hash}')
+    cache_file = f'{cache_prefix}.v{VacancyColumns.cache_version}.{get_file_fingerprint(file_name)}'
+    if memmap and os.path.isdir(cache_file):
+        return VacancyColumns.open_memmap(cache_file)
+    if not memmap and os.path.exists(f'{cache_file}.npz'):
+        return VacancyColumns.load(f'{cache_file}.npz')
+    columns = DataSet(file_name, stream=True).to_columns()
+    os.makedirs(cache_dir, exist_ok=True)
+    for old_cache_file in glob.glob(f'{glob.escape(cache_prefix)}.*'):
+        if old_cache_file.startswith(cache_file):
+            continue
+        if os.path.isdir(old_cache_file):
+            shutil.rmtree(old_cache_file, ignore_errors=True)
+        elif os.path.exists(old_cache_file):
+            os.remove(old_cache_file)
+    if not memmap:
+        columns.save(f'{cache_file}.npz')
+        return columns
+    columns.save_memmap(cache_file)
+    return VacancyColumns.open_memmap(cache_file)
+
+
+def create_batch_reports(file_name, profs, output_dir='reports', workers=None, pdf_backend='reportlab',
+                         cache_dir='vacancy_cache'):
+    """Создать report.xlsx, graph.png и report.pdf для каждой профессии, прочитав файл один раз
+
+    Вакансии берутся колонками из кэша load_vacancy_columns, и строки каждой профессии находятся по сохранённому
+    в нём индексу названий. Графики всех профессий рисуются параллельно в процессах пула до создания PDF-файлов.
+
+        Args:
+            file_name (str): путь к csv-файлу
+            profs (list): названия профессий
+            output_dir (str): папка, в которой для каждой профессии создаётся своя папка с отчётом
+            workers (int): количество процессов для графиков; None - по числу ядер
+            pdf_backend (str): способ создания PDF - reportlab или wkhtmltopdf
+            cache_dir (str): папка кэша колонок; None - разобрать csv без кэша
+
+        Returns:
+            dict: профессия -> данные статистики
+    """
+    from chart_renderer import render_charts
+
+    columns = load_vacancy_columns(file_name, cache_dir)
+    batch_data = Constractor(accumulate=True).compile_batch(columns, profs)
+    reports = []
+    for prof, data in batch_data.items():
+        prof_dir = ''.join('_' if char in '<>:"/\\|?*' else char for char in prof)
+        report = CreateReport(data, prof, os.path.join(output_dir, prof_dir))
+        report.create_excel_sheets()
+        reports.append(report)
+    render_charts(((report.get_chart_data(), report.prof, os.path.join(report.output_dir, 'graph.png'))
+                   for report in reports), workers)
+    for report in reports:
+        report.create_pdf(pdf_backend)
+    return batch_data
+
+
+def generate_output(data_vacancies, position_title, column_headers=None, rates=None, details=None):
     """Сгенерировать вывод по шаблону
 
         Args:
-            data_vacancies: данные вакансий
+            data_vacancies: данные вакансий - строки csv-файла или VacancyColumns
             position_title: название профессии
+            column_headers (list): заголовки колонок, если вакансии переданы строками csv-файла
+            rates (CurrencyRates): курсы валют по месяцам; None - постоянные курсы currency_to_rub
+            details (VacancyDetails): куда построчно выгружать вакансии профессии
     """
-    compiled_vacancies_arr = []
-    for compilation in data_vacancies:
-        compilation = Vacancy(dict(zip(column_headers, compilation)))
-        compiled_vacancies_arr.append(compilation)
-    data = Constractor()
-    data = data.compile_data(compiled_vacancies_arr, position_title)
+    if isinstance(data_vacancies, VacancyColumns):
+        compiled_vacancies = data_vacancies
+    else:
+        compiled_vacancies = (Vacancy(dict(zip(column_headers, compilation))) for compilation in data_vacancies)
+    data = Constractor(accumulate=True, rates=rates, details=details)
+    data = data.compile_data(compiled_vacancies, position_title)
 
     print(f'Динамика уровня зарплат по годам: {data[0]}')
     print(f'Динамика количества вакансий по годам: {data[1]}')
@@ -580,15 +2251,69 @@ def generate_output(data_vacancies, position_title):
     print(f'Динамика количества вакансий по годам для выбранной профессии: {data[3]}')
     print(f'Уровень зарплат по городам (в порядке убывания): {data[4]}')
     print(f'Доля вакансий по городам (в порядке убывания): {data[5]}')
-    
+
     return data
 
 
-users_input = UsersInput()
-requested_data = DataSet(users_input.compiled_file)
-column_headers, vacancies_data = requested_data.columns_names, requested_data.vacancies_data
-output_data = generate_output(vacancies_data, users_input.position_title)
-generated_report = CreateReport(output_data, users_input.position_title)
-generated_report.create_excel_sheets()
-generated_report.create_image()
-generated_report.create_pdf()
+report_formats = ('xlsx', 'png', 'pdf')
+optional_formats = ('svg',)
+
+
+def run(file_name=None, prof=None, output_dir='.', formats=report_formats, rates_file=None, with_details=False,
+        pdf_backend='reportlab', cache_dir='vacancy_cache'):
+    """Построить отчёт со статистикой: report.xlsx, graph.png и report.pdf
+
+        Args:
+            file_name (str): путь к csv-файлу; если не задан вместе с prof, спрашивается у пользователя
+            prof (str): название профессии
+            output_dir (str): папка для файлов отчёта
+            formats: какие файлы создавать - xlsx, png, pdf; для pdf нужен график, поэтому он создаётся и с pdf;
+                svg - наборы SVG-графиков по годам в папке year_charts, только если формат указан явно; файлы
+                по годам для них каждый раз создаются заново во временной папке
+            rates_file (str): файл курсов валют по датам для CurrencyRates; None - постоянные курсы
+            with_details (bool): выгрузить каждую вакансию профессии листом report.xlsx или файлом vacancies.csv
+            pdf_backend (str): способ создания PDF - reportlab в текущем процессе или wkhtmltopdf
+            cache_dir (str): папка кэша разобранных вакансий; None - не использовать кэш
+
+        Returns:
+            tuple: данные статистики
+
+        Raises:
+            ReportError: некорректные входные данные или в файле нет вакансий
+    """
+    if file_name is None or prof is None:
+        users_input = UsersInput()
+        file_name, prof = users_input.compiled_file, users_input.position_title
+    file_name = UsersInput.validate_file_name(file_name)
+    prof = UsersInput.validate_position_name(prof)
+    unknown_formats = set(formats) - set(report_formats + optional_formats)
+    if unknown_formats:
+        raise ReportError(f'Неизвестный формат отчёта: {", ".join(sorted(unknown_formats))}')
+    if pdf_backend not in pdf_backends:
+        raise ReportError(f'Неизвестный способ создания PDF: {pdf_backend}')
+    rates = None if rates_file is None else CurrencyRates.from_file(rates_file)
+    vacancies_data = load_vacancy_columns(file_name, cache_dir)
+    details = VacancyDetails(output_dir) if with_details else None
+    try:
+        output_data = generate_output(vacancies_data, prof, rates=rates, details=details)
+        generated_report = CreateReport(output_data, prof, output_dir)
+        if 'xlsx' in formats:
+            generated_report.create_excel_sheets(details)
+        elif details is not None:
+            details.export(output_dir)
+    finally:
+        if details is not None:
+            details.close()
+    if 'png' in formats or 'pdf' in formats:
+        generated_report.create_image()
+    if 'pdf' in formats:
+        generated_report.create_pdf(pdf_backend)
+    if 'svg' in formats:
+        with tempfile.TemporaryDirectory(prefix='.years-', dir=output_dir) as years_dir:
+            csv_files_generator.separate_years_file(file_name, years_dir)
+            create_year_charts(prof, years_dir, os.path.join(output_dir, 'year_charts'), rates=rates)
+    return output_data
+
+
+if __name__ == '__main__':
+    run()
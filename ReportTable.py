@@ -1,17 +1,18 @@
 import csv
+import os
 from datetime import datetime
 from statistics import mean
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
-import numpy as np
-import matplotlib.pyplot as plt
+import csv_file_separator as csv_files_generator
 
 currency_to_rub = {'AZN': 35.68, 'BYR': 23.91, 'EUR': 59.90, 'GEL': 21.74, 'KGS': 0.76, 'KZT': 0.13, 'RUR': 1,
                    'UAH': 1.64, 'USD': 60.66, 'UZS': 0.0055
                    }
 
 
+class ReportError(Exception):
+    """Ошибка входных данных отчёта: некорректное название файла или профессии, пустой файл, нет данных"""
+
+
 class UsersInput:
     """Класс для пользовательского ввода по шаблону"""
 
@@ -30,8 +31,7 @@ class UsersInput:
                 compiled_file (str): Выбранный файл
         """
         if compiled_file == '' or '.' not in compiled_file:
-            print('Некорректное название файла')
-            exit()
+            raise ReportError('Некорректное название файла')
         return compiled_file
 
     @staticmethod
@@ -45,33 +45,63 @@ class UsersInput:
                     str: корректное название профессии
                 """
         if position_title == '':
-            print('Некорректное название профессии')
-            exit()
+            raise ReportError('Некорректное название профессии')
         return position_title
 
 
 class DataSet:
     """Класс, представляющий сбор данных"""
-    def __init__(self, compiled_file):
+    def __init__(self, compiled_file, stream=False):
         """Инициализация объекта DataSet
 
             Args:
                 compiled_file (str): Выбранный файл
+                stream (bool): отдавать строки лениво, по мере чтения файла
         """
-        self.reader = []
-        for row in csv.reader(open(compiled_file, encoding='utf_8_sig')):
-            self.reader += [row]
-        if len(self.reader) == 0:
-            print('Пустой файл')
-            exit()
-        self.columns_names = self.reader[0]
-        self.vacancies_data = []
-        for row in self.reader[1:]:
-            if len(row) == len(self.columns_names) and row.count('') == 0:
-                self.vacancies_data += [row]
-        if len(self.vacancies_data) == 0:
-            print('Нет данных')
-            exit()
+        self.file_name = compiled_file
+        with open(compiled_file, encoding='utf_8_sig') as file:
+            self.columns_names = next(csv.reader(file), None)
+        if self.columns_names is None:
+            raise ReportError('Пустой файл')
+        self.vacancies_data = self.read_vacancies_data()
+        if not stream:
+            self.vacancies_data = list(self.vacancies_data)
+
+    @classmethod
+    def from_column_files(cls, directory='years_data', years=None, predicate=None):
+        """Создать DataSet по колоночным файлам годов вместо csv-файла
+
+            Args:
+                directory (str): папка с колоночными файлами, созданными csv_file_separator.create_column_files
+                years: нужные годы; None - все годы
+                predicate: функция отбора файла по словарю min/max его колонок
+
+            Returns:
+                DataSet: строки вакансий с уже преобразованными зарплатами и годом публикации
+        """
+        data_set = cls.__new__(cls)
+        data_set.file_name = directory
+        data_set.columns_names = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+        column_files = csv_files_generator.find_column_files(directory, years, predicate)
+        data_set.vacancies_data = csv_files_generator.read_column_rows(column_files, data_set.columns_names)
+        return data_set
+
+    def read_vacancies_data(self):
+        """Построчно считывает файл и отдаёт только корректные строки, не храня их в памяти
+
+            Yields:
+                list: строка вакансии, в которой заполнены все колонки
+        """
+        is_empty = True
+        with open(self.file_name, encoding='utf_8_sig') as file:
+            rows = csv.reader(file)
+            next(rows, None)
+            for row in rows:
+                if len(row) == len(self.columns_names) and row.count('') == 0:
+                    is_empty = False
+                    yield row
+        if is_empty:
+            raise ReportError('Нет данных')
 
 
 class Vacancy:
@@ -109,6 +139,8 @@ class Vacancy:
         if key in ['salary_from', 'salary_to']:
             return float(value)
         if key == 'published_at':
+            if isinstance(value, int):
+                return value
             return int(datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').strftime('%Y'))
         return value
 
@@ -213,14 +245,15 @@ class Constractor:
         elif self.year_vacancy_salary.salary_dict != {} and len(
                 list(self.year_salary.calculate_average_salary().keys())) != len(
             list(self.year_vacancy_salary.calculate_average_salary().keys())):
-            for key in list(self.year_salary.calculate_average_salary().keys()):
-                self.set_key_to_zero(key)
+            year_vacancy_salary = self.year_vacancy_salary.calculate_average_salary()
+            for key in self.year_salary.calculate_average_salary():
+                self.set_key_to_zero(year_vacancy_salary, key)
         if self.year_position_vacancy_amount.amount_dict == {}:
             self.year_position_vacancy_amount.amount_dict = {x: 0 for x in self.year_vacancy_amount.amount_dict.keys()}
         elif self.year_position_vacancy_amount.amount_dict != {} and len(
                 list(self.year_vacancy_amount.amount_dict.keys())) != len(
             list(self.year_position_vacancy_amount.amount_dict.keys())):
-            for key in list(self.year_vacancy_amount.amount_dict.keys()):
+            for key in self.year_vacancy_amount.amount_dict:
                 self.set_position_vacancy_key_to_zero(key)
         self.town_salary, list_del_town = self.calculate_highest_average_salary(self.town_salary)
         self.town_job_rate.calculate_proportion()
@@ -237,17 +270,19 @@ class Constractor:
                 key: ключ
 
         """
-        if key not in list(self.year_position_vacancy_amount.amount_dict.keys()):
+        if key not in self.year_position_vacancy_amount.amount_dict:
             self.year_position_vacancy_amount.amount_dict[key] = 0
 
-    def set_key_to_zero(self, key):
+    @staticmethod
+    def set_key_to_zero(year_vacancy_salary, key):
         """Вспомогательная функция для приведения значения количества профессий к нулю по ключу
 
             Args:
+                year_vacancy_salary (dict): средние зарплаты профессии по годам
                 key: ключ
         """
-        if key not in list(self.year_vacancy_salary.calculate_average_salary().keys()):
-            self.year_vacancy_salary.calculate_average_salary()[key] = 0
+        if key not in year_vacancy_salary:
+            year_vacancy_salary[key] = 0
 
     def calculate_stat_values(self, place, vacancies):
         """Обновить полученные значения пунктов
@@ -277,32 +312,17 @@ class Constractor:
                 tuple: (высшая зарплата, фильтр списка городов)
         """
         average_salary_values = []
-        town_tracker = {}
-        for i in range(len(list_all_salary.salary_dict)):
-            town = list(list_all_salary.salary_dict)[i]
-            town_tracker[town] = len(list(list_all_salary.salary_dict.values())[i])
-            aver = int(sum(list(list_all_salary.salary_dict.values())[i]) /
-                       len(list(list_all_salary.salary_dict.values())[i]))
-            average_salary_values.append((town, aver))
-
         del_for_towns = []
-        del_town_index = []
-        for i in range(len(town_tracker.items())):
-            town = list(town_tracker)[i]
-            percentage = round(100 * int(list(town_tracker.values())[i]) / sum(town_tracker.values()), 1)
+        total = sum(len(salaries) for salaries in list_all_salary.salary_dict.values())
+        for town, salaries in list_all_salary.salary_dict.items():
+            percentage = round(100 * len(salaries) / total, 1)
             if percentage < 1 or town == 'Россия':
-                del_for_towns.append((town, list(town_tracker.values())[i]))
-                del_town_index.append(i)
-
-        for i in reversed(range(len(del_for_towns))):
-            del town_tracker[del_for_towns[i][0]]
-            del average_salary_values[del_town_index[i]]
+                del_for_towns.append((town, len(salaries)))
+            else:
+                average_salary_values.append((town, int(sum(salaries) / len(salaries))))
 
-        highest_average_salary = dict(sorted(average_salary_values, key=lambda row: row[1], reverse=True))
-        significant_salaries = {}
-        for key, value in highest_average_salary.items():
-            significant_salaries[key] = value
-        return {x: significant_salaries[x] for x in list(significant_salaries)[:10]}, del_for_towns
+        highest_average_salary = sorted(average_salary_values, key=lambda row: row[1], reverse=True)
+        return dict(highest_average_salary[:10]), del_for_towns
 
     @staticmethod
     def find_highest_town_rating(town_job_rate):
@@ -331,30 +351,20 @@ class Constractor:
 
 class CreateReport:
     """Класс для создания отчёта"""
-    def __init__(self):
+    def __init__(self, output_dir='.'):
         """Инициализация объекта CreateReport
 
             Args:
-                data: полученные в ходе подсчётов данные
-                prof (str): название профессии
+                output_dir (str): папка для report.xlsx и graph.png
         """
-        self.wb = Workbook()
-        self.sheet1 = self.wb.active
-        self.sheet1.title = 'Статистика по годам'
-        self.sheet2 = self.wb.create_sheet('Статистика по городам')
-
-        self.fig = plt.figure()
-        self.ax1 = self.fig.add_subplot(221)
-        self.ax1.set_title('Уровень зарплат по годам')
-        self.ax2 = self.fig.add_subplot(222)
-        self.ax2.set_title('Количество вакансий по годам')
-        self.ax3 = self.fig.add_subplot(223)
-        self.ax3.set_title('Уровень зарплат по городам')
-        self.ax4 = self.fig.add_subplot(224)
-        self.ax4.set_title('Доля вакансий по городам')
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
 
     def create_excel_sheets(self, data, place):
-        """Создать файл Excel"""
+        """Создать файл Excel потоковой записью write-only листов"""
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+        from excel_writer import ExcelWriter
+
         year_salary = data[0]
         year_vacancy_amount = data[1]
         year_vacancy_salary = data[2]
@@ -366,149 +376,38 @@ class CreateReport:
                     'Количество вакансий', f'Количество вакансий - {place}']
         titles_2 = ['Город', 'Уровень зарплат', 'Город', 'Доля вакансий']
 
-        for i, name in enumerate(titles_1):
-            self.sheet1.cell(row=1, column=(i + 1), value=name).font = Font(bold=True)
+        excel_writer = ExcelWriter()
+        sheet1 = excel_writer.create_sheet('Статистика по годам', titles_1)
         for year, value in year_salary.items():
-            self.sheet1.append(
+            sheet1.append(
                 [year, value, year_vacancy_salary[year], year_vacancy_amount[year], year_position_vacancy_amount[year]])
 
-        for i, name in enumerate(titles_2):
-            self.sheet2.cell(row=1, column=(i + 1), value=name).font = Font(bold=True)
-        for i in range(len(list(town_salary.keys()))):
-            self.sheet2.append(
-                [list(town_salary.keys())[i], list(town_salary.values())[i], list(town_job_rate.keys())[i],
-                 list(town_job_rate.values())[i]])
-
-        cell_border = Side(border_style='thin', color='000000')
-        self.place_border(self.sheet1, cell_border)
-        self.place_border(self.sheet2, cell_border)
-        self.sheet2.insert_cols(3)
-        self.sheet2.column_dimensions['C'].width = 2
-
-        self.calculate_column_width(self.sheet1)
-        self.calculate_column_width(self.sheet2)
-
-        for i in range(2, len(self.sheet2['E']) + 1):
-            self.sheet2[f'E{i}'].number_format = FORMAT_PERCENTAGE_00
-
-        self.wb.save('report.xlsx')
-
-    @staticmethod
-    def place_border(ws, side):
-        """Установить границы таблицы Excel
-
-            Args:
-                ws: рабочая плоскость
-                cell_border (int): граница
-        """
-        for cell in ws._cells.values():
-            cell.border = Border(top=side, bottom=side, left=side, right=side)
-
-    @staticmethod
-    def calculate_column_width(ws):
-        """Посчитать ширину колонки
+        sheet2 = excel_writer.create_sheet('Статистика по городам', titles_2, number_formats={5: FORMAT_PERCENTAGE_00},
+                                           spacer_columns=[3])
+        town_job_rate_items = iter(town_job_rate.items())
+        for town, salary in town_salary.items():
+            sheet2.append([town, salary, *next(town_job_rate_items, (None, None))])
 
-            Args:
-                ws: рабочая плоскость
-        """
-        dimension_dict = {}
-        for row in ws.rows:
-            for cell in row:
-                if cell.value:
-                    dimension_dict[cell.column_letter] = max((dimension_dict.get(cell.column_letter, 0),
-                                                              len(str(cell.value))))
-        for column_var, value in dimension_dict.items():
-            ws.column_dimensions[column_var].width = value + 2
+        excel_writer.save(os.path.join(self.output_dir, 'report.xlsx'))
 
     def create_image(self, data, place):
-        """Создать картинку со статистическими данными"""
-        year_salary = data[0]
-        year_vacancy_amount = data[1]
-        year_vacancy_salary = data[2]
-        year_position_vacancy_amount = data[3]
-        town_salary = data[4]
-        town_job_rate = data[5]
-
-        width_12 = 0.4
-        x_nums_1 = np.arange(len(year_salary.keys()))
-        x_list1_1 = x_nums_1 - width_12 / 2
-        x_list1_2 = x_nums_1 + width_12 / 2
-
-        self.ax1.bar(x_list1_1, year_salary.values(), width_12, label='средняя з/п')
-        self.ax1.bar(x_list1_2, year_vacancy_salary.values(), width_12, label=f'з/п {place}')
-        self.ax1.set_xticks(x_nums_1, year_salary.keys(), rotation='vertical')
-        self.ax1.tick_params(axis='both', labelsize=8)
-        self.ax1.legend(fontsize=8)
-        self.ax1.grid(True, axis='y')
-
-        x_nums_2 = np.arange(len(year_vacancy_amount.keys()))
-        x_list2_1 = x_nums_2 - width_12 / 2
-        x_list2_2 = x_nums_2 + width_12 / 2
-
-        self.ax2.bar(x_list2_1, year_vacancy_amount.values(), width_12, label='Количество вакансий')
-        self.ax2.bar(x_list2_2, year_position_vacancy_amount.values(), width_12, label=f'Количество вакансий\n{place}')
-        self.ax2.set_xticks(x_nums_2, year_vacancy_amount.keys(), rotation='vertical')
-        self.ax2.tick_params(axis='both', labelsize=8)
-        self.ax2.legend(fontsize=8)
-        self.ax2.grid(True, axis='y')
-
-        img_titles = {}
-        self.apply_attributes(img_titles, town_salary)
-
-        width_3 = 0.7
-        y_nums = np.arange(len(list(img_titles.keys())))
-
-        self.ax3.barh(y_nums, img_titles.values(), width_3, align='center')
-        self.ax3.set_yticks(y_nums, img_titles.keys())
-        self.ax3.tick_params(axis='y', labelsize=6)
-        self.ax3.tick_params(axis='x', labelsize=8)
-        self.ax3.invert_yaxis()
-        self.ax3.grid(True, axis='x')
-
-        other = 1
-        data = [1]
-        labels = ['Другие']
-        for key, value in town_job_rate.items():
-            data.append(value * 100)
-            labels.append(key)
-            other -= value
-        data[0] = round(other, 4) * 100
-        textprops = {"fontsize": 6}
-
-        self.ax4.pie(data, labels=labels, textprops=textprops, radius=1.1)
-
-        plt.tight_layout()
-        plt.savefig('graph.png')
-
-    def apply_attributes(self, img_titles, town_salary):
-        """Задать параметры текста на картинке
+        """Создать картинку со статистическими данными на Agg-холсте, без состояния pyplot"""
+        from chart_renderer import render_chart
 
-            Args:
-                img_titles (str): заголовки пунктов на картинках
-        """
-        for key, value in town_salary.items():
-            if ' ' in key:
-                key = str(key).replace(' ', '\n')
-            elif '-' in key and key.count('-') == 1:
-                key = str(key).replace('-', '-\n')
-            elif '-' in key and key.count('-') != 1:
-                key = str(key).replace('-', '-\n', 1)
-            img_titles[key] = value
+        render_chart(data, place, os.path.join(self.output_dir, 'graph.png'))
 
 
-def generate_output(data_vacancies, position_title):
+def generate_output(data_vacancies, position_title, column_headers):
     """Сгенерировать вывод по шаблону
 
         Args:
             data_vacancies: данные вакансий
             position_title: название профессии
+            column_headers (list): заголовки колонок
     """
-    compiled_vacancies_arr = []
-    for compilation in data_vacancies:
-        compilation = Vacancy(dict(zip(column_headers, compilation)))
-        compiled_vacancies_arr.append(compilation)
+    compiled_vacancies = (Vacancy(dict(zip(column_headers, compilation))) for compilation in data_vacancies)
     data = Constractor()
-    data = data.compile_data(compiled_vacancies_arr, position_title)
+    data = data.compile_data(compiled_vacancies, position_title)
 
     print(f'Динамика уровня зарплат по годам: {data[0]}')
     print(f'Динамика количества вакансий по годам: {data[1]}')
@@ -520,10 +419,41 @@ def generate_output(data_vacancies, position_title):
     return data
 
 
-users_input = UsersInput()
-requested_data = DataSet(users_input.compiled_file)
-column_headers, vacancies_data = requested_data.columns_names, requested_data.vacancies_data
-output_data = generate_output(vacancies_data, users_input.position_title)
-generated_report = CreateReport()
-generated_report.create_excel_sheets(output_data, users_input.position_title)
-generated_report.create_image(output_data, users_input.position_title)
+report_formats = ('xlsx', 'png')
+
+
+def run(file_name=None, prof=None, output_dir='.', formats=report_formats):
+    """Построить отчёт со статистикой: report.xlsx и graph.png
+
+        Args:
+            file_name (str): путь к csv-файлу; если не задан вместе с prof, спрашивается у пользователя
+            prof (str): название профессии
+            output_dir (str): папка для файлов отчёта
+            formats: какие файлы создавать - xlsx, png
+
+        Returns:
+            tuple: данные статистики
+
+        Raises:
+            ReportError: некорректные входные данные или в файле нет вакансий
+    """
+    if file_name is None or prof is None:
+        users_input = UsersInput()
+        file_name, prof = users_input.compiled_file, users_input.position_title
+    file_name = UsersInput.validate_file_name(file_name)
+    prof = UsersInput.check_position_name(prof)
+    unknown_formats = set(formats) - set(report_formats)
+    if unknown_formats:
+        raise ReportError(f'Неизвестный формат отчёта: {", ".join(sorted(unknown_formats))}')
+    requested_data = DataSet(file_name, stream=True)
+    output_data = generate_output(requested_data.vacancies_data, prof, requested_data.columns_names)
+    generated_report = CreateReport(output_dir)
+    if 'xlsx' in formats:
+        generated_report.create_excel_sheets(output_data, prof)
+    if 'png' in formats:
+        generated_report.create_image(output_data, prof)
+    return output_data
+
+
+if __name__ == '__main__':
+    run()
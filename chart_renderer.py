@@ -0,0 +1,282 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+chart_style = {'font.family': 'sans-serif', 'font.sans-serif': ['DejaVu Sans'], 'figure.figsize': (6.4, 4.8),
+               'figure.dpi': 100, 'savefig.dpi': 'figure', 'svg.hashsalt': 'report'}
+chart_titles = ('Уровень зарплат по годам', 'Количество вакансий по годам', 'Уровень зарплат по городам',
+                'Доля вакансий по городам')
+bundle_names = ('salary_level', 'vacancy_count', 'town_salary', 'town_share')
+
+is_font_loaded = False
+
+
+def load_fonts():
+    """Один раз на процесс загрузить список шрифтов matplotlib и найти шрифт графиков
+
+    Стили chart_style не записываются в общие matplotlib.rcParams, а действуют только внутри
+    matplotlib.rc_context на время рисования. Повторные вызовы ничего не делают, поэтому функция служит
+    и инициализатором процессов пула.
+    """
+    global is_font_loaded
+    if is_font_loaded:
+        return
+    font_manager.findfont(font_manager.FontProperties(family=chart_style['font.sans-serif']))
+    is_font_loaded = True
+
+
+def format_town_label(town):
+    """Перенести название города на несколько строк для подписи на графике
+
+        Args:
+            town (str): название города
+
+        Returns:
+            str: подпись с переносами
+    """
+    if ' ' in town:
+        return town.replace(' ', '\n')
+    if town.count('-') == 1:
+        return town.replace('-', '-\n')
+    if '-' in town:
+        return town.replace('-', '-\n', 1)
+    return town
+
+
+def draw_year_salary(ax, year_salary, year_vacancy_salary, prof):
+    """Нарисовать уровень зарплат по годам: средняя зарплата и зарплата профессии
+
+        Args:
+            ax: оси графика
+            year_salary (dict): год -> средняя зарплата
+            year_vacancy_salary (dict): год -> средняя зарплата профессии
+            prof (str): название профессии
+    """
+    width = 0.4
+    x_nums = np.arange(len(year_salary))
+    ax.set_title(chart_titles[0])
+    ax.bar(x_nums - width / 2, year_salary.values(), width, label='средняя з/п')
+    ax.bar(x_nums + width / 2, year_vacancy_salary.values(), width, label=f'з/п {prof}')
+    ax.set_xticks(x_nums, year_salary.keys(), rotation='vertical')
+    ax.tick_params(axis='both', labelsize=8)
+    ax.legend(fontsize=8)
+    ax.grid(True, axis='y')
+
+
+def draw_year_vacancies(ax, year_vacancy_amount, year_position_vacancy_amount, prof):
+    """Нарисовать количество вакансий по годам: всех и профессии
+
+        Args:
+            ax: оси графика
+            year_vacancy_amount (dict): год -> количество вакансий
+            year_position_vacancy_amount (dict): год -> количество вакансий профессии
+            prof (str): название профессии
+    """
+    width = 0.4
+    x_nums = np.arange(len(year_vacancy_amount))
+    ax.set_title(chart_titles[1])
+    ax.bar(x_nums - width / 2, year_vacancy_amount.values(), width, label='Количество вакансий')
+    ax.bar(x_nums + width / 2, year_position_vacancy_amount.values(), width, label=f'Количество вакансий\n{prof}')
+    ax.set_xticks(x_nums, year_vacancy_amount.keys(), rotation='vertical')
+    ax.tick_params(axis='both', labelsize=8)
+    ax.legend(fontsize=8)
+    ax.grid(True, axis='y')
+
+
+def draw_town_salary(ax, town_salary):
+    """Нарисовать уровень зарплат по городам горизонтальными столбцами
+
+        Args:
+            ax: оси графика
+            town_salary (dict): город -> уровень зарплат
+    """
+    y_nums = np.arange(len(town_salary))
+    ax.set_title(chart_titles[2])
+    ax.barh(y_nums, town_salary.values(), 0.7, align='center')
+    ax.set_yticks(y_nums, [format_town_label(str(town)) for town in town_salary])
+    ax.tick_params(axis='y', labelsize=6)
+    ax.tick_params(axis='x', labelsize=8)
+    ax.invert_yaxis()
+    ax.grid(True, axis='x')
+
+
+def draw_town_share(ax, town_job_rating):
+    """Нарисовать долю вакансий по городам круговой диаграммой с сектором остальных городов
+
+        Args:
+            ax: оси графика
+            town_job_rating (dict): город -> доля вакансий
+    """
+    other = 1
+    data = [1]
+    labels = ['Другие']
+    for key, value in town_job_rating.items():
+        data.append(value * 100)
+        labels.append(key)
+        other -= value
+    data[0] = round(other, 4) * 100
+    ax.set_title(chart_titles[3])
+    ax.pie(data, labels=labels, textprops={'fontsize': 6}, radius=1.1)
+
+
+def create_figure(data, prof):
+    """Создать фигуру с четырьмя графиками статистики на собственном Agg-холсте, без состояния pyplot
+
+        Args:
+            data (tuple): данные статистики в порядке Constractor.assemble_data
+            prof (str): название профессии
+
+        Returns:
+            Figure: фигура, которую сборщик мусора удалит вместе с последней ссылкой на неё
+    """
+    load_fonts()
+    year_salary, year_vacancy_amount, year_vacancy_salary, year_position_vacancy_amount, town_salary, \
+        town_job_rating = data
+    with matplotlib.rc_context(chart_style):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        draw_year_salary(fig.add_subplot(221), year_salary, year_vacancy_salary, prof)
+        draw_year_vacancies(fig.add_subplot(222), year_vacancy_amount, year_position_vacancy_amount, prof)
+        draw_town_salary(fig.add_subplot(223), town_salary)
+        draw_town_share(fig.add_subplot(224), town_job_rating)
+        fig.tight_layout()
+    return fig
+
+
+def render_chart(data, prof, file_name):
+    """Нарисовать графики статистики и сохранить их в файл
+
+        Args:
+            data (tuple): данные статистики в порядке Constractor.assemble_data
+            prof (str): название профессии
+            file_name (str): путь к картинке; формат определяется расширением
+
+        Returns:
+            str: путь к картинке
+    """
+    with matplotlib.rc_context(chart_style):
+        create_figure(data, prof).savefig(file_name)
+    return file_name
+
+
+def render_bundle(data, prof, directory, file_format='svg'):
+    """Нарисовать каждый из четырёх графиков статистики отдельным файлом
+
+    Дата создания в файлы не записывается, а идентификаторы svg-элементов не случайны, поэтому по одинаковой
+    статистике получаются одинаковые файлы.
+
+        Args:
+            data (tuple): данные статистики в порядке Constractor.assemble_data
+            prof (str): название профессии
+            directory (str): папка для файлов графиков
+            file_format (str): формат файлов
+
+        Returns:
+            list: пути к файлам графиков в порядке bundle_names
+    """
+    load_fonts()
+    year_salary, year_vacancy_amount, year_vacancy_salary, year_position_vacancy_amount, town_salary, \
+        town_job_rating = data
+    drawings = ((draw_year_salary, (year_salary, year_vacancy_salary, prof)),
+                (draw_year_vacancies, (year_vacancy_amount, year_position_vacancy_amount, prof)),
+                (draw_town_salary, (town_salary,)),
+                (draw_town_share, (town_job_rating,)))
+    os.makedirs(directory, exist_ok=True)
+    file_names = get_bundle_files(directory, file_format)
+    with matplotlib.rc_context(chart_style):
+        for file_name, (draw, args) in zip(file_names, drawings):
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            draw(fig.add_subplot(), *args)
+            fig.tight_layout()
+            fig.savefig(file_name, format=file_format, metadata={'Date': None})
+    return file_names
+
+
+def get_bundle_files(directory, file_format='svg'):
+    """Получить пути к файлам графиков, которые создаёт render_bundle
+
+        Args:
+            directory (str): папка для файлов графиков
+            file_format (str): формат файлов
+
+        Returns:
+            list: пути к файлам графиков в порядке bundle_names
+    """
+    return [os.path.join(directory, f'{name}.{file_format}') for name in bundle_names]
+
+
+def render_job(job):
+    """Выполнить задание render_charts в процессе пула
+
+        Args:
+            job (tuple): (данные статистики, название профессии, путь к картинке)
+
+        Returns:
+            str: путь к картинке
+    """
+    return render_chart(*job)
+
+
+def render_bundle_job(job):
+    """Выполнить задание render_bundles в процессе пула
+
+        Args:
+            job (tuple): (данные статистики, название профессии, папка для файлов графиков)
+
+        Returns:
+            list: пути к файлам графиков
+    """
+    return render_bundle(*job)
+
+
+def run_in_pool(function, jobs, workers=None):
+    """Выполнить задания рисования в процессах пула
+
+    Каждый процесс загружает шрифты один раз при запуске и дальше только рисует фигуры.
+
+        Args:
+            function: функция, получающая одно задание
+            jobs: задания
+            workers (int): количество процессов; 1 - рисовать в текущем процессе, None - по числу ядер
+
+        Returns:
+            list: результаты в порядке заданий
+    """
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        return [function(job) for job in jobs]
+    with ProcessPoolExecutor(workers, initializer=load_fonts) as executor:
+        return list(executor.map(function, jobs))
+
+
+def render_charts(jobs, workers=None):
+    """Нарисовать графики нескольких отчётов параллельно в процессах пула
+
+        Args:
+            jobs: задания (данные статистики, название профессии, путь к картинке)
+            workers (int): количество процессов; 1 - рисовать в текущем процессе, None - по числу ядер
+
+        Returns:
+            list: пути к картинкам в порядке заданий
+    """
+    return run_in_pool(render_job, jobs, workers)
+
+
+def render_bundles(jobs, workers=None):
+    """Нарисовать наборы отдельных графиков параллельно в процессах пула
+
+        Args:
+            jobs: задания (данные статистики, название профессии, папка для файлов графиков)
+            workers (int): количество процессов; 1 - рисовать в текущем процессе, None - по числу ядер
+
+        Returns:
+            list: списки путей к файлам графиков в порядке заданий
+    """
+    return run_in_pool(render_bundle_job, jobs, workers)
@@ -1,10 +1,107 @@
 import csv
+import glob
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+
+numeric_columns = {'salary_from': 'float64', 'salary_to': 'float64', 'published_at': 'int16',
+                   'published_month': 'int8'}
+chunk_size = 65536
+
+days_in_month = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+published_at_digits = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 22, 23]
+
+
+class YearFilesWriter:
+    """Буферизованная запись строк в csv-файлы по годам с ограниченным числом открытых файлов"""
+    def __init__(self, titles, directory='years_data', max_open_files=16, batch_size=1000):
+        """Инициализация объекта YearFilesWriter
+
+
+        Args:
+            titles (list): заголовки колонок
+            directory (str): папка для файлов по годам
+            max_open_files (int): сколько файлов может быть открыто одновременно
+            batch_size (int): сколько строк года копится перед записью
+        """
+        self.titles = titles
+        self.directory = directory
+        self.max_open_files = max_open_files
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.files = OrderedDict()
+        self.created_files = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_row(self, title, row):
+        """Добавить строку в буфер файла и записать буфер, когда он заполнится
+
+
+        Args:
+            title (str): название файла года, например 2022.csv
+            row (list): строка вакансии
+        """
+        buffer = self.buffers.setdefault(title, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(title)
+
+    def flush(self, title):
+        """Записать накопленные строки файла одним writerows
+
+
+        Args:
+            title (str): название файла года
+        """
+        self.get_writer(title).writerows(self.buffers[title])
+        self.buffers[title] = []
+
+    def get_writer(self, title):
+        """Получить csv.writer для файла, при необходимости закрыв давно не использованный файл
+
+
+        Args:
+            title (str): название файла года
+
+        Returns:
+            csv.writer: объект записи в файл года
+        """
+        if title in self.files:
+            self.files.move_to_end(title)
+            return self.files[title][1]
+        if len(self.files) >= self.max_open_files:
+            self.files.popitem(last=False)[1][0].close()
+        is_created = title in self.created_files
+        file = open(os.path.join(self.directory, title), 'a' if is_created else 'w', encoding='utf-8-sig')
+        csv_creator = csv.writer(file, lineterminator="\r")
+        if not is_created:
+            csv_creator.writerow(self.titles)
+            self.created_files.add(title)
+        self.files[title] = (file, csv_creator)
+        return csv_creator
+
+    def close(self):
+        """Записать все оставшиеся строки и закрыть файлы"""
+        for title, buffer in self.buffers.items():
+            if buffer:
+                self.flush(title)
+        for file, csv_creator in self.files.values():
+            file.close()
+        self.files.clear()
 
 
 def create_csv_files(compiled_data_dict, titles):
     """Создать csv-файлы с выборкой по отдельным годам
-    
-    
+
+
     Args:
         compiled_data_dict (dict): данные о вакансиях по годам
         titles (list): заголовки колонок
@@ -17,19 +114,256 @@ def create_csv_files(compiled_data_dict, titles):
             csv_creator.writerows(i[1])
 
 
-def separate_years_data(file_strings, titles):
-    """Создаёт отдельный csv-файл для каждого года
-    
-    
+def separate_years_data(file_strings, titles, directory='years_data', max_open_files=16, batch_size=1000):
+    """Создаёт отдельный csv-файл для каждого года, записывая строки по мере чтения
+
+
         Args:
-            file_strings (list): строки, считанные из общей выгрузки
+            file_strings: строки, считанные из общей выгрузки, - список или любой итератор
             titles (list): заголовки столбцов
+            directory (str): папка для файлов по годам
+            max_open_files (int): сколько файлов может быть открыто одновременно
+            batch_size (int): сколько строк года копится перед записью
     """
-    listed_years_dict = {}
     date_indicator = titles.index('published_at')
-    for i in file_strings:
-        year = f"{i[date_indicator][0:4]}.csv"
-        if year not in listed_years_dict.keys():
-            listed_years_dict[year] = []
-        listed_years_dict[year].append(i)
-    create_csv_files(listed_years_dict, titles)
+    with YearFilesWriter(titles, directory, max_open_files, batch_size) as writer:
+        for i in file_strings:
+            if len(i) > date_indicator:
+                writer.write_row(f"{i[date_indicator][0:4]}.csv", i)
+
+
+def separate_years_file(file_name, directory='years_data', max_open_files=16, batch_size=1000, columnar=False):
+    """Потоково разложить общую выгрузку по csv-файлам годов, не загружая её в память
+
+
+        Args:
+            file_name (str): путь к общей выгрузке
+            directory (str): папка для файлов по годам
+            max_open_files (int): сколько файлов может быть открыто одновременно
+            batch_size (int): сколько строк года копится перед записью
+            columnar (bool): дополнительно сохранить каждый год в колоночном npz-файле
+    """
+    with open(file_name, encoding='utf-8-sig') as file:
+        file_strings = csv.reader(file)
+        titles = next(file_strings, None)
+        if titles is not None:
+            separate_years_data(file_strings, titles, directory, max_open_files, batch_size)
+    if columnar:
+        create_column_files(directory)
+
+
+def parse_date(value):
+    """Получить год, месяц и день из published_at срезами по фиксированным позициям
+
+    Быстрый путь срабатывает только для строк вида 2022-07-05T18:19:30+0300 с заведомо допустимыми
+    значениями. Всё остальное разбирается datetime.strptime, поэтому некорректные даты отклоняются так же.
+
+
+        Args:
+            value (str): дата публикации
+
+        Returns:
+            tuple: (год, месяц, день)
+    """
+    if len(value) == 24 and value.isascii() and value[4] == '-' and value[7] == '-' and value[10] == 'T' \
+            and value[13] == ':' and value[16] == ':' and value[19] in '+-' \
+            and ''.join(value[i] for i in published_at_digits).isdigit():
+        year, month, day = int(value[0:4]), int(value[5:7]), int(value[8:10])
+        if year >= 1 and 1 <= month <= 12 and 1 <= day <= days_in_month[month - 1] + (
+                month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)) \
+                and int(value[11:13]) <= 23 and int(value[14:16]) <= 59 and int(value[17:19]) <= 59 \
+                and int(value[20:22]) <= 23 and int(value[22:24]) <= 59:
+            return year, month, day
+    published = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+    return published.year, published.month, published.day
+
+
+def parse_dates(values):
+    """Получить годы, месяцы и дни для целой порции published_at векторными операциями numpy
+
+    Строки, не прошедшие быструю проверку формата, разбираются по одной через parse_date.
+
+
+        Args:
+            values: даты публикации - список или кортеж строк
+
+        Returns:
+            tuple: (годы, месяцы, дни) в виде массивов int64
+    """
+    import numpy as np
+
+    codes = np.asarray(values, dtype='U25').view(np.uint32).reshape(len(values), 25).astype(np.int64)
+    digits = codes[:, published_at_digits] - ord('0')
+    is_fast = (codes[:, 24] == 0) & ((digits >= 0) & (digits <= 9)).all(axis=1) \
+        & (codes[:, 4] == ord('-')) & (codes[:, 7] == ord('-')) & (codes[:, 10] == ord('T')) \
+        & (codes[:, 13] == ord(':')) & (codes[:, 16] == ord(':')) \
+        & ((codes[:, 19] == ord('+')) | (codes[:, 19] == ord('-')))
+    digits = np.where(is_fast[:, None], digits, 0)
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month, day, hour, minute, second, offset_hours, offset_minutes = [
+        digits[:, i] * 10 + digits[:, i + 1] for i in range(4, 18, 2)]
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array(days_in_month)[np.clip(month, 1, 12) - 1] + ((month == 2) & is_leap)
+    is_fast &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days) & (hour <= 23) \
+        & (minute <= 59) & (second <= 59) & (offset_hours <= 23) & (offset_minutes <= 59)
+    for i in np.flatnonzero(~is_fast).tolist():
+        year[i], month[i], day[i] = parse_date(values[i])
+    return year, month, day
+
+
+def convert_column_chunk(titles, rows, categories):
+    """Перевести порцию строк csv-файла в массивы колонок
+
+
+        Args:
+            titles (list): заголовки колонок
+            rows (list): корректные строки порции
+            categories (dict): заголовок -> справочник значение -> код, дополняемый новыми значениями
+
+        Returns:
+            dict: заголовок -> массив значений порции; дата публикации - колонками published_at и published_month
+    """
+    import numpy as np
+
+    result = {}
+    for title, column in zip(titles, zip(*rows)):
+        if title == 'published_at':
+            years, months, days = parse_dates(column)
+            result['published_at'] = years.astype(numeric_columns['published_at'])
+            result['published_month'] = months.astype(numeric_columns['published_month'])
+        elif title in numeric_columns:
+            result[title] = np.fromiter(map(float, column), dtype=numeric_columns[title], count=len(column))
+        else:
+            codes = categories.setdefault(title, {})
+            result[title] = np.fromiter((codes.setdefault(value, len(codes)) for value in column), dtype=np.int32,
+                                        count=len(column))
+    return result
+
+
+def create_column_files(directory='years_data'):
+    """Сохранить каждый csv-файл года в сжатый колоночный npz-файл и записать статистику колонок
+
+
+    Зарплаты хранятся в float64, год публикации в int16, месяц публикации - отдельной колонкой published_month
+    в int8, остальные колонки - кодами int32 и списком уникальных значений. В columns_meta.json для каждого
+    файла записываются количество строк и min/max числовых колонок, чтобы отбирать годы, не открывая файлы.
+    Строки переводятся в массивы порциями по chunk_size, а даты разбираются parse_dates.
+
+        Args:
+            directory (str): папка с csv-файлами по годам
+    """
+    import numpy as np
+
+    meta = {}
+    for csv_name in sorted(glob.glob(os.path.join(glob.escape(directory), '*.csv'))):
+        chunks = []
+        categories = {}
+        rows_amount = 0
+        with open(csv_name, encoding='utf-8-sig') as file:
+            file_strings = csv.reader(file)
+            titles = next(file_strings, None)
+            if not titles:
+                continue
+            rows = []
+            for i in file_strings:
+                if len(i) == len(titles) and i.count('') == 0:
+                    rows.append(i)
+                    if len(rows) == chunk_size:
+                        chunks.append(convert_column_chunk(titles, rows, categories))
+                        rows_amount += len(rows)
+                        rows = []
+            if rows:
+                chunks.append(convert_column_chunk(titles, rows, categories))
+                rows_amount += len(rows)
+        if not chunks:
+            continue
+        fields = {'titles': np.array(titles, dtype=str)}
+        stats = {}
+        for title in chunks[0]:
+            column = np.concatenate([chunk[title] for chunk in chunks])
+            if title in numeric_columns:
+                fields[title] = column
+                stats[title] = [column.min().item(), column.max().item()]
+            else:
+                fields[f'{title}.codes'] = column
+                fields[f'{title}.values'] = np.array(list(categories[title]), dtype=str)
+        column_file = f'{os.path.splitext(csv_name)[0]}.npz'
+        np.savez_compressed(column_file, **fields)
+        meta[os.path.basename(column_file)] = {'rows': rows_amount, 'stats': stats}
+    with open(os.path.join(directory, 'columns_meta.json'), 'w', encoding='utf-8') as file:
+        json.dump(meta, file, ensure_ascii=False)
+
+
+def find_column_files(directory='years_data', years=None, predicate=None):
+    """Отобрать колоночные файлы годов по статистике из columns_meta.json, не открывая сами файлы
+
+
+        Args:
+            directory (str): папка с колоночными файлами
+            years: нужные годы; None - все годы
+            predicate: функция, получающая словарь min/max колонок файла и решающая, нужен ли он
+
+        Returns:
+            list: пути к подходящим npz-файлам по возрастанию года
+    """
+    with open(os.path.join(directory, 'columns_meta.json'), encoding='utf-8') as file:
+        meta = json.load(file)
+    years = None if years is None else set(years)
+    column_files = []
+    for column_file, file_meta in sorted(meta.items()):
+        if years is not None and 'published_at' in file_meta['stats']:
+            year_min, year_max = file_meta['stats']['published_at']
+            if not any(year_min <= year <= year_max for year in years):
+                continue
+        if predicate is not None and not predicate(file_meta['stats']):
+            continue
+        column_files.append(os.path.join(directory, column_file))
+    return column_files
+
+
+def read_column_file(file_name, columns=None):
+    """Прочитать из колоночного файла только нужные колонки
+
+
+        Args:
+            file_name (str): путь к npz-файлу
+            columns (list): нужные колонки; None - все колонки
+
+        Returns:
+            dict: массив значений для числовой колонки, пара (коды, список значений) - для остальных
+    """
+    import numpy as np
+
+    with np.load(file_name) as data:
+        titles = data['titles'].tolist()
+        result = {}
+        for title in columns or titles:
+            if title in numeric_columns:
+                result[title] = data[title]
+            else:
+                result[title] = (data[f'{title}.codes'], data[f'{title}.values'].tolist())
+    return result
+
+
+def read_column_rows(file_names, columns):
+    """Перебрать строки колоночных файлов со значениями уже нужных типов
+
+
+        Args:
+            file_names (list): пути к npz-файлам
+            columns (list): нужные колонки в порядке значений строки
+
+        Yields:
+            list: значения строки
+    """
+    for file_name in file_names:
+        data = read_column_file(file_name, columns)
+        values = []
+        for title in columns:
+            if title in numeric_columns:
+                values.append(data[title].tolist())
+            else:
+                codes, categories = data[title]
+                values.append([categories[code] for code in codes.tolist()])
+        for i in zip(*values):
+            yield list(i)
@@ -0,0 +1,164 @@
+from copy import copy
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side
+from openpyxl.utils import get_column_letter
+
+
+class SheetWriter:
+    """Потоковая запись строк в write-only лист Excel
+
+    Первые sample_size строк копятся в буфере: по ним и заголовку считается ширина колонок, которую
+    write-only лист принимает только до записи первой строки. Дальше строки пишутся сразу, поэтому
+    память не зависит от количества строк, а время записи растёт линейно.
+    """
+    def __init__(self, ws, styles, titles, number_formats=None, spacer_columns=(), spacer_width=2,
+                 sample_size=1000):
+        """Инициализация объекта SheetWriter
+
+            Args:
+                ws: write-only лист
+                styles (ExcelStyles): общие стили ячеек книги
+                titles (list): заголовки колонок без пустых колонок-разделителей
+                number_formats (dict): номер колонки с 1 после вставки разделителей -> числовой формат
+                spacer_columns: номера пустых колонок-разделителей с 1, вставляемых в каждую строку
+                spacer_width (int): ширина колонок-разделителей
+                sample_size (int): сколько первых строк учитывается при подсчёте ширины колонок
+        """
+        self.ws = ws
+        self.styles = styles
+        self.number_formats = number_formats or {}
+        self.spacer_columns = sorted(spacer_columns)
+        self.spacer_width = spacer_width
+        self.sample_size = sample_size
+        self.widths = {}
+        self.buffer = []
+        self.is_flushed = False
+        self.buffer.append(self.create_row(titles, is_title=True))
+
+    def append(self, values):
+        """Добавить строку значений
+
+            Args:
+                values (list): значения строки без колонок-разделителей
+        """
+        row = self.create_row(values)
+        if self.is_flushed:
+            self.ws.append(row)
+        else:
+            self.buffer.append(row)
+            if len(self.buffer) > self.sample_size:
+                self.flush()
+
+    def create_row(self, values, is_title=False):
+        """Создать ячейки строки с общими стилями и учесть их значения в ширине колонок
+
+            Args:
+                values (list): значения строки без колонок-разделителей
+                is_title (bool): строка заголовков
+
+            Returns:
+                list: ячейки строки
+        """
+        values = list(values)
+        for column in self.spacer_columns:
+            values.insert(column - 1, None)
+        row = []
+        for column, value in enumerate(values, 1):
+            if column in self.spacer_columns:
+                row.append(None)
+                continue
+            cell = WriteOnlyCell(self.ws, value)
+            cell._style = copy(self.styles.get_style(self.ws, is_title, None if is_title else
+                                                     self.number_formats.get(column)))
+            if value and not self.is_flushed:
+                self.widths[column] = max(self.widths.get(column, 0), len(str(value)))
+            row.append(cell)
+        return row
+
+    def flush(self):
+        """Задать ширину колонок по накопленным строкам и записать их в лист"""
+        if self.is_flushed:
+            return
+        for column in self.spacer_columns:
+            self.ws.column_dimensions[get_column_letter(column)].width = self.spacer_width
+        for column, width in self.widths.items():
+            self.ws.column_dimensions[get_column_letter(column)].width = width + 2
+        for row in self.buffer:
+            self.ws.append(row)
+        self.buffer = []
+        self.is_flushed = True
+
+
+class ExcelStyles:
+    """Стили ячеек, созданные один раз на книгу: граница, жирный шрифт заголовков и числовые форматы
+
+    Ячейкам присваивается копия готового набора индексов стилей, а не новые объекты Border и Font,
+    поэтому стиль не регистрируется в книге заново для каждой ячейки.
+    """
+    def __init__(self):
+        """Инициализация объекта ExcelStyles"""
+        side = Side(border_style='thin', color='000000')
+        self.border = Border(top=side, bottom=side, left=side, right=side)
+        self.title_font = Font(bold=True)
+        self.style_arrays = {}
+
+    def get_style(self, ws, is_title=False, number_format=None):
+        """Получить набор индексов стилей, зарегистрировав его в книге при первом обращении
+
+            Args:
+                ws: лист книги
+                is_title (bool): стиль заголовка
+                number_format (str): числовой формат; None - общий формат
+
+            Returns:
+                StyleArray: индексы стилей ячейки
+        """
+        key = (is_title, number_format)
+        if key not in self.style_arrays:
+            template = WriteOnlyCell(ws)
+            template.border = self.border
+            if is_title:
+                template.font = self.title_font
+            if number_format is not None:
+                template.number_format = number_format
+            self.style_arrays[key] = template._style
+        return self.style_arrays[key]
+
+
+class ExcelWriter:
+    """Книга Excel в режиме write-only, листы которой пишутся потоково"""
+    def __init__(self):
+        """Инициализация объекта ExcelWriter"""
+        self.wb = Workbook(write_only=True)
+        self.styles = ExcelStyles()
+        self.sheets = []
+
+    def create_sheet(self, title, titles, number_formats=None, spacer_columns=(), sample_size=1000):
+        """Создать лист для потоковой записи
+
+            Args:
+                title (str): название листа
+                titles (list): заголовки колонок
+                number_formats (dict): номер колонки с 1 -> числовой формат
+                spacer_columns: номера пустых колонок-разделителей с 1
+                sample_size (int): сколько первых строк учитывается при подсчёте ширины колонок
+
+            Returns:
+                SheetWriter: объект записи строк листа
+        """
+        sheet = SheetWriter(self.wb.create_sheet(title), self.styles, titles, number_formats, spacer_columns,
+                            sample_size=sample_size)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, file_name):
+        """Дописать буферы листов и сохранить книгу
+
+            Args:
+                file_name (str): путь к xlsx-файлу
+        """
+        for sheet in self.sheets:
+            sheet.flush()
+        self.wb.save(file_name)
@@ -1,13 +1,85 @@
-import ReportPDF
-import ReportTable
-
-def main():
-    """Выбор формирования отчета: в виде pdf или таблицы PrettyTable."""
-    type_of_report = input("Введите тип отчета (Вакансии/Статистика): ")
-    if type_of_report == "Вакансии":
-        ReportTable.create_table()
-    elif type_of_report == "Статистика":
-        ReportPDF.create_pdf()
+import argparse
+import importlib
+import sys
+
+report_modules = {'Вакансии': 'ReportTable', 'Статистика': 'ReportPDF'}
+
+
+def create_parser():
+    """Создать разбор аргументов командной строки
+
+        Returns:
+            argparse.ArgumentParser: разбор аргументов
+    """
+    parser = argparse.ArgumentParser(description='Формирование отчёта по вакансиям. '
+                                                 'Без аргументов параметры спрашиваются в диалоге.')
+    parser.add_argument('file_name', nargs='?', help='путь к csv-файлу с вакансиями')
+    parser.add_argument('prof', nargs='?', help='название профессии')
+    parser.add_argument('-t', '--type', choices=list(report_modules), default='Статистика', help='тип отчёта')
+    parser.add_argument('-o', '--output-dir', default='.', help='папка для файлов отчёта')
+    parser.add_argument('-f', '--formats', nargs='+', choices=['xlsx', 'png', 'pdf', 'svg'],
+                        help='какие файлы создавать; по умолчанию - xlsx, png и pdf выбранного отчёта; '
+                             'svg - графики по годам для отчёта Статистика')
+    parser.add_argument('-d', '--details', action='store_true',
+                        help='выгрузить каждую вакансию профессии листом report.xlsx или файлом vacancies.csv '
+                             'для отчёта Статистика')
+    parser.add_argument('-r', '--rates', help='файл курсов валют по датам (xml ЦБ или csv date,currency,rate) '
+                                              'для отчёта Статистика')
+    parser.add_argument('-p', '--pdf-backend', choices=['reportlab', 'wkhtmltopdf'],
+                        help='способ создания report.pdf для отчёта Статистика: reportlab - в текущем процессе '
+                             '(по умолчанию), wkhtmltopdf - из pdf_template.html внешней программой')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('-c', '--cache-dir',
+                             help='папка кэша разобранных вакансий для отчёта Статистика; по умолчанию - vacancy_cache')
+    cache_group.add_argument('--no-cache', action='store_true',
+                             help='разбирать csv-файл заново без кэша для отчёта Статистика')
+    return parser
+
+
+def main(argv=None):
+    """Выбор формирования отчета: в виде pdf или таблицы PrettyTable.
+
+    Модули отчётов импортируются только после выбора, поэтому меню появляется сразу,
+    а зависимости загружаются лишь для выбранного отчёта.
+
+        Args:
+            argv (list): аргументы командной строки; None - sys.argv
+
+        Returns:
+            int: код завершения
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.file_name is None:
+        type_of_report = input("Введите тип отчета (Вакансии/Статистика): ")
+        if type_of_report not in report_modules:
+            print("Неверный тип отчета!")
+            return 0
+    elif args.prof is None:
+        parser.error('нужно указать и файл, и профессию')
     else:
-        print("Неверный тип отчета!")
-        exit(0)
\ No newline at end of file
+        type_of_report = args.type
+    options = {} if args.rates is None else {'rates_file': args.rates}
+    if args.details:
+        options['with_details'] = True
+    if args.pdf_backend is not None:
+        options['pdf_backend'] = args.pdf_backend
+    if args.no_cache:
+        options['cache_dir'] = None
+    elif args.cache_dir is not None:
+        options['cache_dir'] = args.cache_dir
+    if options and type_of_report != 'Статистика':
+        parser.error('курсы валют по датам, выгрузку вакансий, выбор способа создания PDF и кэш '
+                     'поддерживает только отчёт Статистика')
+    report_module = importlib.import_module(report_modules[type_of_report])
+    try:
+        report_module.run(args.file_name, args.prof, args.output_dir, args.formats or report_module.report_formats,
+                          **options)
+    except (report_module.ReportError, OSError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import os
+from xml.sax.saxutils import escape
+
+import matplotlib
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+font_files = {'DejaVuSans': 'DejaVuSans.ttf', 'DejaVuSans-Bold': 'DejaVuSans-Bold.ttf'}
+
+
+def register_fonts():
+    """Один раз на процесс зарегистрировать шрифты с кириллицей из шрифтов, поставляемых с matplotlib"""
+    registered_fonts = pdfmetrics.getRegisteredFontNames()
+    fonts_dir = os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf')
+    for font_name, font_file in font_files.items():
+        if font_name not in registered_fonts:
+            pdfmetrics.registerFont(TTFont(font_name, os.path.join(fonts_dir, font_file)))
+
+
+def create_table(titles, rows, width, spacer_columns=()):
+    """Создать таблицу с границами ячеек и жирными заголовками, переносящимися по словам
+
+        Args:
+            titles (list): заголовки колонок без пустых колонок-разделителей
+            rows: строки значений без колонок-разделителей
+            width (float): ширина таблицы, поровну делимая между колонками, кроме разделителей
+            spacer_columns: номера пустых колонок-разделителей с 1, вставляемых в каждую строку без границ
+
+        Returns:
+            Table: таблица
+    """
+    title_style = ParagraphStyle('table_title', fontName='DejaVuSans-Bold', fontSize=7, leading=9)
+    titles = [Paragraph(escape(str(title)), title_style) for title in titles]
+    data = []
+    for row in [titles, *rows]:
+        row = ['' if value is None else value for value in row]
+        for column in sorted(spacer_columns):
+            row.insert(column - 1, '')
+        data.append(row)
+    columns_amount = len(data[0])
+    style = [('FONT', (0, 0), (-1, -1), 'DejaVuSans', 7),
+             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]
+    block_start = 0
+    for column in [*sorted(spacer_columns), columns_amount + 1]:
+        if column - 1 > block_start:
+            style.append(('GRID', (block_start, 0), (column - 2, -1), 0.5, colors.black))
+        block_start = column
+    spacer_width = 4 * mm
+    column_width = (width - spacer_width * len(spacer_columns)) / (columns_amount - len(spacer_columns))
+    col_widths = [spacer_width if column in spacer_columns else column_width
+                  for column in range(1, columns_amount + 1)]
+    return Table(data, colWidths=col_widths, style=TableStyle(style), repeatRows=1, hAlign='LEFT')
+
+
+def render_report_pdf(file_name, prof, image_file, year_table, town_table):
+    """Нарисовать PDF-отчёт в текущем процессе: заголовок, картинку графиков и две таблицы статистики
+
+        Args:
+            file_name (str): путь к PDF-файлу
+            prof (str): название профессии
+            image_file (str): путь к картинке графиков
+            year_table (tuple): (заголовки, строки) статистики по годам
+            town_table (tuple): (заголовки, строки) статистики по городам; третья колонка - разделитель
+
+        Returns:
+            str: путь к PDF-файлу
+    """
+    register_fonts()
+    title_style = ParagraphStyle('title', fontName='DejaVuSans-Bold', fontSize=14, leading=18, spaceAfter=6)
+    heading_style = ParagraphStyle('heading', fontName='DejaVuSans-Bold', fontSize=11, leading=14, spaceBefore=8,
+                                   spaceAfter=4)
+    document = SimpleDocTemplate(file_name, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                                 topMargin=15 * mm, bottomMargin=15 * mm, title=f'Аналитика по профессии {prof}')
+    title = escape(f'Аналитика по зарплатам и городам для профессии {prof}')
+    image_width, image_height = ImageReader(image_file).getSize()
+    width = document.width
+    document.build([Paragraph(title, title_style),
+                    Image(image_file, width=width, height=width * image_height / image_width),
+                    Paragraph('Статистика по годам', heading_style),
+                    create_table(*year_table, width),
+                    Spacer(1, 4 * mm),
+                    Paragraph('Статистика по городам', heading_style),
+                    create_table(*town_table, width, spacer_columns=[3])])
+    return file_name
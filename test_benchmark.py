@@ -0,0 +1,113 @@
+import gc
+import tempfile
+import time
+
+from ReportPDF import Constractor, CreateReport
+
+
+def create_town_stats(towns_amount, vacancies_per_town=3):
+    """Заполнить статистику вакансиями из towns_amount разных городов
+
+        Args:
+            towns_amount (int): количество городов
+            vacancies_per_town (int): количество вакансий в каждом городе
+
+        Returns:
+            Constractor: статистика, в рейтинги которой попадают все города
+    """
+    stats = Constractor(accumulate=True, top_k=None, threshold=0)
+    for town in range(towns_amount):
+        for i in range(vacancies_per_town):
+            salary = 10000 + town * 7 + i
+            stats.year_salary.append_salary(2022, salary)
+            stats.year_vacancy_amount.update_amount(2022)
+            stats.town_salary.append_salary(f'Город {town}', salary)
+            stats.town_job_rating.update_amount(f'Город {town}')
+    return stats
+
+
+def time_stage(function, min_time=0.05):
+    """Замерить среднее время одного вызова, повторяя вызовы, пока они не займут не меньше min_time
+
+    Сборщик мусора на время замера отключается, как в timeit: иначе его проходы по растущей куче
+    добавляют к времени большего замера нелинейную составляющую.
+
+        Args:
+            function: замеряемая функция без аргументов
+            min_time (float): минимальное суммарное время повторов в секундах
+
+        Returns:
+            float: время одного вызова в секундах
+    """
+    calls = 0
+    is_gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                return elapsed / calls
+    finally:
+        if is_gc_enabled:
+            gc.enable()
+
+
+def measure_town_stages(towns_amount, repeat=3):
+    """Замерить время стадий, время которых растёт с количеством городов; берётся лучший из repeat замеров
+
+        Args:
+            towns_amount (int): количество городов
+            repeat (int): количество замеров
+
+        Returns:
+            dict: название стадии -> время одного вызова в секундах
+    """
+    stats = create_town_stats(towns_amount)
+    data = stats.assemble_data()
+    timings = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        report = CreateReport(data, 'Программист', output_dir)
+        stages = {'assemble_data': stats.assemble_data,
+                  'town_stats_compilation': lambda: [[town, rating_town] for town, salary, rating_town, rating
+                                                     in report.get_town_rows()],
+                  'create_excel_sheets': report.create_excel_sheets}
+        for i in range(repeat):
+            for stage, function in stages.items():
+                timings[stage] = min(timings.get(stage, float('inf')), time_stage(function))
+    return timings
+
+
+def check_linear_growth(towns_amount=5000, scale=4, max_ratio=11):
+    """Проверить, что время стадий растёт линейно: при росте числа городов в scale раз
+    квадратичная стадия замедлилась бы в scale ** 2 раз
+
+        Args:
+            towns_amount (int): количество городов в меньшем замере
+            scale (int): во сколько раз больше городов в большем замере
+            max_ratio (float): допустимое отношение времени большего замера к меньшему - между scale и scale ** 2
+
+        Returns:
+            dict: название стадии -> (время меньшего замера, время большего замера)
+    """
+    small = measure_town_stages(towns_amount)
+    large = measure_town_stages(towns_amount * scale)
+    result = {}
+    for stage, small_time in small.items():
+        ratio = large[stage] / small_time
+        print(f'{stage}: {towns_amount} городов - {small_time:.4f} с, '
+              f'{towns_amount * scale} городов - {large[stage]:.4f} с (x{ratio:.1f})')
+        assert ratio <= max_ratio, f'{stage} растёт быстрее линейного: x{ratio:.1f} при x{scale} городов'
+        result[stage] = (small_time, large[stage])
+    return result
+
+
+def test_town_stages_grow_linearly():
+    """Время стадий, зависящих от количества городов, растёт линейно"""
+    check_linear_growth()
+
+
+if __name__ == '__main__':
+    check_linear_growth()
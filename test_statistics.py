@@ -0,0 +1,199 @@
+import csv
+import json
+import random
+from datetime import datetime
+from statistics import mean
+
+import numpy as np
+import pytest
+
+import csv_file_separator
+from ReportPDF import (Constractor, DataSet, NameIndex, ProfessionMatcher, SalaryAccumulator, Vacancy,
+                       compile_data_parallel, currency_to_rub, load_vacancy_columns)
+
+
+profs = ['Аналитик', 'Python', 'программист', 'Космонавт', 'ик']
+vacancy_names = ['Аналитик', 'Системный аналитик', 'Бизнес-аналитик данных', 'Python-программист',
+                 'Ведущий программист Python', 'Программист 1С', 'Водитель', 'Менеджер, продажи', 'Инженер']
+towns = ['Москва', 'Санкт-Петербург', 'Ростов-на-Дону', 'Нижний Новгород', 'Казань', 'Омск'] + \
+        [f'Город {i}' for i in range(40)]
+
+
+@pytest.fixture(scope='module')
+def vacancies_file(tmp_path_factory):
+    """Сгенерированная выгрузка вакансий с пропусками значений, названиями с запятыми и разными валютами"""
+    generator = random.Random(2022)
+    file_name = tmp_path_factory.mktemp('data') / 'vacancies.csv'
+    with open(file_name, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+        for i in range(5000):
+            salary_from = generator.randrange(10000, 200000, 500)
+            salary_to = salary_from + generator.choice([0, 0.5, 1000, 25000.25])
+            published_at = f'{generator.randint(2005, 2022)}-{generator.randint(1, 12):02}-' \
+                           f'{generator.randint(1, 28):02}T{generator.randint(0, 23):02}:17:00+0300'
+            row = [generator.choice(vacancy_names), salary_from, salary_to, generator.choice(list(currency_to_rub)),
+                   generator.choice(towns), published_at]
+            if i % 97 == 0:
+                row[generator.randrange(len(row))] = ''
+            writer.writerow(row)
+    return str(file_name)
+
+
+@pytest.fixture(scope='module')
+def vacancies(vacancies_file):
+    """Вакансии выгрузки в виде объектов Vacancy"""
+    data_set = DataSet(vacancies_file)
+    return [Vacancy(dict(zip(data_set.columns_names, row))) for row in data_set.vacancies_data]
+
+
+@pytest.mark.parametrize('prof', profs)
+def test_columns_match_rows(vacancies_file, vacancies, prof):
+    """Подсчёт по колонкам numpy совпадает с построчным подсчётом"""
+    expected = Constractor(accumulate=False).compile_data(vacancies, prof)
+    columns = DataSet(vacancies_file, stream=True).to_columns()
+    assert Constractor(accumulate=False).compile_data(columns, prof) == expected
+
+
+@pytest.mark.parametrize('prof', profs)
+def test_cached_columns_match_rows(vacancies_file, vacancies, tmp_path, prof):
+    """Колонки из кэша, открытые через np.memmap и из npz-файла, дают тот же результат"""
+    expected = Constractor(accumulate=False).compile_data(vacancies, prof)
+    for memmap in (True, False):
+        load_vacancy_columns(vacancies_file, tmp_path, memmap)
+        columns = load_vacancy_columns(vacancies_file, tmp_path, memmap)
+        assert Constractor(accumulate=False).compile_data(columns, prof) == expected
+
+
+@pytest.mark.parametrize('prof', profs)
+def test_accumulator_matches_rows(vacancies, prof):
+    """Подсчёт накопителями O(1) памяти совпадает с подсчётом по спискам зарплат"""
+    expected = Constractor(accumulate=False).compile_data(vacancies, prof)
+    assert Constractor(accumulate=True).compile_data(iter(vacancies), prof) == expected
+
+
+@pytest.mark.parametrize('prof', ['Аналитик', 'Космонавт'])
+def test_parallel_matches_rows(vacancies_file, vacancies, prof):
+    """Подсчёт в нескольких процессах совпадает с однопроцессным"""
+    expected = Constractor(accumulate=False).compile_data(vacancies, prof)
+    assert compile_data_parallel(vacancies_file, prof, 2) == expected
+
+
+def test_batch_matches_rows(vacancies_file, vacancies):
+    """Подсчёт сразу нескольких профессий по строкам и по колонкам совпадает с подсчётом каждой отдельно"""
+    expected = {prof: Constractor(accumulate=False).compile_data(vacancies, prof) for prof in profs}
+    assert Constractor(accumulate=True).compile_batch(iter(vacancies), profs) == expected
+    columns = DataSet(vacancies_file, stream=True).to_columns()
+    assert Constractor(accumulate=True).compile_batch(columns, profs) == expected
+
+
+def create_accumulator(salaries):
+    """Накопитель с учтёнными зарплатами
+
+        Args:
+            salaries (list): зарплаты
+
+        Returns:
+            SalaryAccumulator: накопитель
+    """
+    accumulator = SalaryAccumulator()
+    for salary in salaries:
+        accumulator.append(salary)
+    return accumulator
+
+
+def test_accumulator_mean():
+    """Среднее накопителя совпадает со statistics.mean"""
+    generator = random.Random(1)
+    for size in (1, 2, 3, 10, 1000):
+        salaries = [generator.uniform(1000, 500000) * generator.choice([1, 0.0055, 59.9]) for i in range(size)]
+        accumulator = create_accumulator(salaries)
+        assert accumulator.mean() == mean(salaries)
+        assert (accumulator.count, accumulator.minimum, accumulator.maximum) == \
+            (len(salaries), min(salaries), max(salaries))
+
+
+def test_accumulator_merge_is_associative():
+    """Объединение частей в любом порядке даёт ту же точную сумму, что и один проход"""
+    generator = random.Random(2)
+    salaries = [generator.uniform(1000, 500000) * generator.choice([1, 0.13, 23.91]) for i in range(300)]
+    parts = [salaries[:50], salaries[50:51], salaries[51:]]
+    first, second, third = [create_accumulator(part) for part in parts]
+    left = (first + second) + third
+    right = first + (second + third)
+    whole = create_accumulator(salaries)
+    for merged in (left, right):
+        assert (merged.count, merged.mean(), merged.total, merged.minimum, merged.maximum) == \
+            (whole.count, whole.mean(), whole.total, whole.minimum, whole.maximum)
+        assert merged.float_sum == pytest.approx(whole.float_sum)
+        assert merged.squares_sum == pytest.approx(whole.squares_sum)
+    assert SalaryAccumulator().merge(whole).to_state() == whole.to_state()
+
+
+def test_state_round_trip(vacancies):
+    """Состояние накопителя и статистики переживает сохранение в json"""
+    accumulator = create_accumulator([1.5, 100000.0, 0.0055 * 12345])
+    state = json.loads(json.dumps(accumulator.to_state()))
+    assert SalaryAccumulator.from_state(state).to_state() == accumulator.to_state()
+
+    constractor = Constractor(accumulate=True)
+    constractor.compile_data(iter(vacancies[:2000]), 'Аналитик')
+    restored = Constractor.from_state(json.loads(json.dumps(constractor.to_state())))
+    assert restored.to_state() == constractor.to_state()
+    assert restored.assemble_data() == constractor.assemble_data()
+
+
+def test_merge_matches_single_pass(vacancies):
+    """Статистика, объединённая из частей выгрузки, совпадает с подсчётом одним проходом"""
+    expected = Constractor(accumulate=False).compile_data(vacancies, 'Аналитик')
+    merged = Constractor(accumulate=True)
+    for start in range(0, len(vacancies), 1500):
+        part = Constractor(accumulate=True)
+        part.compile_data(iter(vacancies[start:start + 1500]), 'Аналитик')
+        merged.merge(part)
+    assert merged.assemble_data() == expected
+
+
+def test_profession_matcher_matches_substring():
+    """Ахо-Корасик находит те же профессии, что и проверка prof in name"""
+    matcher = ProfessionMatcher(profs + ['Аналитик'])
+    for name in vacancy_names + ['', 'ик', 'Pythonик', 'аналитик']:
+        assert matcher.find(name) == [prof for prof in matcher.profs if prof in name]
+
+
+def test_name_index_matches_substring(vacancies_file, tmp_path):
+    """Индекс названий, построенный и открытый из кэша, находит те же строки, что и prof in name"""
+    built = DataSet(vacancies_file, stream=True).to_columns()
+    load_vacancy_columns(vacancies_file, tmp_path)
+    cached = load_vacancy_columns(vacancies_file, tmp_path)
+    queries = profs + ['', 'а', 'Программист 1С', 'Менеджер, продажи', 'нет такой', 'Pyt']
+    for columns, name_index in ((built, NameIndex.from_names(built.names, built.name_codes)),
+                                (cached, cached.name_index)):
+        for prof in queries:
+            expected = np.flatnonzero([prof in columns.names[code] for code in columns.name_codes.tolist()])
+            assert name_index.find_rows(prof).tolist() == expected.tolist()
+            assert columns.find_prof_rows(prof).tolist() == expected.tolist()
+
+
+def test_parse_dates_matches_strptime():
+    """Быстрый разбор дат срезами совпадает с datetime.strptime и так же отклоняет некорректные даты"""
+    generator = random.Random(3)
+    values = [f'{generator.randint(1, 9999):04}-{generator.randint(1, 12):02}-{generator.randint(1, 31):02}T'
+              f'{generator.randint(0, 23):02}:{generator.randint(0, 59):02}:{generator.randint(0, 59):02}'
+              f'{generator.choice("+-")}{generator.randint(0, 23):02}{generator.randint(0, 59):02}'
+              for i in range(2000)]
+    values += ['2020-02-29T00:00:00+0300', '2022-07-05T18:19:30+03:00', '2022-07-05T18:19:30Z',
+               '2022-07-05T18:19:30.123456+0300', '2000-02-29T23:59:59-2359']
+    valid_values = []
+    for value in values:
+        try:
+            published = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+        except ValueError:
+            with pytest.raises(ValueError):
+                csv_file_separator.parse_date(value)
+            continue
+        assert csv_file_separator.parse_date(value) == (published.year, published.month, published.day)
+        valid_values.append(value)
+    years, months, days = csv_file_separator.parse_dates(valid_values)
+    expected = [datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z').timetuple()[:3] for value in valid_values]
+    assert list(zip(years.tolist(), months.tolist(), days.tolist())) == expected